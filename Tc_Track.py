@@ -3,11 +3,13 @@ import pandas as pd
 from io import StringIO
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
-import numpy as np
 from PIL import Image
-import io
 import ftplib
 
+from tc_basemap import load_basemap, show_basemap
+from tc_plot import draw_track
+from tc_trackfile import parse_trackfile
+
 Image.MAX_IMAGE_PIXELS = 300000000
 
 # Step 1: Fetch and Process Cyclone Data (Without saving to a CSV file)
@@ -18,41 +20,9 @@ url = "https://www.nrlmry.navy.mil/tcdat/tc2024/AL/AL092024/txt/trackfile.txt"
 # Disable SSL certificate verification and fetch the data
 response = requests.get(url, verify=False)
 
-# Define the column names
-columns = ["Id", "Name", "Date", "Time", "Latitude", "Longitude", "Basin", "Intensity", "Pressure"]
-
 # Load the text data into a pandas dataframe
 if response.status_code == 200:
-    data = StringIO(response.text)
-    df = pd.read_csv(data, delim_whitespace=True, header=None, names=columns)
-
-    # Ensure Time column is in the format 'HH:MM'
-    df['Time'] = df['Time'].astype(int).apply(lambda x: f"{x//100:02}:{x%100:02}")
-
-    # Convert Date column from YYMMDD to YYYY-MM-DD
-    df['Date'] = df['Date'].astype(str).apply(lambda x: f"20{x[:2]}-{x[2:4]}-{x[4:]}")
-
-    # Invert the DataFrame
-    df = df.iloc[::-1].reset_index(drop=True)
-
-    # Combine Date and Time into a new Synoptic Time column
-    df['Synoptic Time'] = df['Date'] + ' ' + df['Time']
-
-    # Drop the original Date and Time columns
-    df = df.drop(columns=['Date', 'Time'])
-
-    # Convert Latitude and Longitude to appropriate signs
-    def convert_latitude(lat):
-        return -float(lat[:-1]) if lat.endswith('S') else float(lat[:-1])
-
-    def convert_longitude(lon):
-        return -float(lon[:-1]) if lon.endswith('W') else float(lon[:-1])
-
-    df['Latitude'] = df['Latitude'].apply(convert_latitude)
-    df['Longitude'] = df['Longitude'].apply(convert_longitude)
-
-    # Reorder the columns to exclude Name and Basin
-    df = df[['Id', 'Name', 'Synoptic Time', 'Latitude', 'Longitude', 'Intensity', 'Pressure']]
+    df = parse_trackfile(response.content)
 
     # Get the cyclone name and Id value
     cyclone_name = df['Name'].iloc[0]  # Get the cyclone name (first entry)
@@ -104,21 +74,8 @@ if response.status_code == 200:
     # Increase the figure size (adjust the width and height as needed)
     fig, ax = plt.subplots(figsize=(15, 12), dpi=300)
 
-    # Step 5: Load the background image from the URL
-    image_url = "https://cdn.trackgen.codingcactus.codes/map.jpg"
-    img_response = requests.get(image_url)
-
-    if img_response.status_code == 200:
-        img = Image.open(io.BytesIO(img_response.content))
-        img = img.resize((int(img.width / 2), int(img.height / 2)), Image.Resampling.LANCZOS)  # Downscale by 2x
-        background_image = np.array(img)
-    else:
-        print(f"Failed to retrieve the image. Status code: {img_response.status_code}")
-        background_image = np.zeros((1000, 1000, 3))  # Placeholder in case of error
-
-    # Define the latitude and longitude limits
-    lat_min, lat_max = -90, 90
-    lon_min, lon_max = -180, 180
+    # Step 5: Load the background image (cached on disk, see tc_basemap.py)
+    background_image = load_basemap()
 
     # Get the last latitude and longitude values
     first_lat = track_data["Latitude"].iloc[1]
@@ -129,38 +86,12 @@ if response.status_code == 200:
     ax.set_xlim(last_lon - 6, last_lon + 9)
     ax.set_ylim(first_lat - 1, last_lat + 2)
 
-    # Set the extent of the background image
-    ax.imshow(background_image, extent=[lon_min, lon_max, lat_min, lat_max])
-
-    # Initialize variables for the first point
-    prev_lat = track_data["Latitude"].iloc[0]
-    prev_lon = track_data["Longitude"].iloc[0]
-
-    # Plot the cyclone track with conditional marker color and default black line color
-    for lat, lon, intensity in zip(track_data["Latitude"], track_data["Longitude"], track_data["Intensity"]):
-        if intensity > 136:
-            marker_color = 'mediumpurple'
-        elif intensity > 113:
-            marker_color = 'magenta'
-        elif intensity > 96:
-            marker_color = 'tomato'
-        elif intensity > 83:
-            marker_color = 'gold'
-        elif intensity > 63:
-            marker_color = 'lemonchiffon'
-        elif intensity > 33:
-            marker_color = 'aqua'
-        elif intensity > 27:
-            marker_color = 'deepskyblue'
-        elif intensity > 22:
-            marker_color = 'steelblue'
-        else:
-            marker_color = 'lime'
-
-        ax.plot([prev_lon, lon], [prev_lat, lat], linestyle='-', color='white', linewidth=0.6, zorder=1)
-        ax.plot(lon, lat, marker='o', color=marker_color, markersize=9, zorder=2, mec='k')
-        prev_lat = lat
-        prev_lon = lon
+    # Draw only the part of the world map inside the axis limits
+    ax.set_aspect('equal')
+    show_basemap(ax, background_image)
+
+    # Plot the cyclone track with category-colored markers
+    draw_track(ax, track_data["Longitude"], track_data["Latitude"], track_data["Intensity"], last_marker_size=9)
 
     # Add the title and legend
     observed_start_time = track_data['Synoptic Time'].iloc[0].strftime("%HZ %d-%b-%Y")
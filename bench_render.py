@@ -0,0 +1,156 @@
+import argparse
+import multiprocessing
+import tempfile
+import json
+import time
+import io
+import os
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+from tc_trackfile import parse_trackfile
+from tc_basemap import preload_basemap
+from tc_timing import peak_rss_mb
+import tc_plot
+
+# Offline benchmark of the track renderer on synthetic storms and a generated
+# stand-in basemap (no network). Every size/case runs in a fresh process so the
+# peak RSS belongs to that configuration alone.
+# Run: python bench_render.py [--sizes 10 100 ...] [--cases nh dateline sh] [--json out.jsonl]
+
+# Start position and overall displacement (degrees) of each synthetic case
+CASES = {
+    "nh": ((12.0, 88.0), (10.0, -6.0)),          # Bay of Bengal, recurving north
+    "dateline": ((14.0, 172.0), (12.0, 18.0)),   # crosses 180 into the western hemisphere
+    "sh": ((-12.0, 65.0), (-14.0, -12.0)),       # South Indian Ocean, moving south-west
+}
+
+
+# Synthetic trackfile text (newest fix first, like NRL) of n 6-hourly fixes.
+# The track covers the same distance for every n, so the viewport depends on the
+# case only and the timings scale with the number of fixes.
+def synthetic_track(n, case="nh", seed=0):
+    rng = np.random.default_rng(seed)
+    (lat0, lon0), (dlat, dlon) = CASES[case]
+    progress = np.linspace(0, 1, n)
+    lats = lat0 + dlat * progress + np.cumsum(rng.normal(0, 0.5, n)) / np.sqrt(n)
+    lons = lon0 + dlon * progress + np.cumsum(rng.normal(0, 0.5, n)) / np.sqrt(n)
+    lons = (lons + 180) % 360 - 180
+    winds = np.clip(20 + 140 * np.sin(np.pi * progress) + rng.normal(0, 5, n), 15, 170).astype(int)
+    pressures = 1010 - winds // 2
+
+    start = np.datetime64("2024-06-01T00:00")
+    times = start + np.arange(n) * np.timedelta64(6, "h")
+    basin = "SH" if case == "sh" else "WP" if case == "dateline" else "IO"
+    lines = [
+        f"{basin}012024 BENCH {t.astype(object):%y%m%d %H%M} {abs(lat):.1f}{'S' if lat < 0 else 'N'} "
+        f"{abs(lon):.1f}{'W' if lon < 0 else 'E'} {basin} {wind} {mslp}"
+        for t, lat, lon, wind, mslp in zip(times, lats, lons, winds, pressures)
+    ]
+    return "\n".join(reversed(lines)) + "\n"
+
+
+# Smooth blue/green world raster with the basemap's equirectangular layout
+def stand_in_basemap(width=4096, seed=0):
+    rng = np.random.default_rng(seed)
+    height = width // 2
+    y, x = (axis.astype(np.float32) / height * np.pi for axis in np.ogrid[0:height, 0:width])
+    field = sum(np.sin(x * k1 + p1) * np.cos(y * k2 + p2) for k1, k2, p1, p2 in rng.uniform(0.5, 4, (6, 4)))
+    land = field > 1.0
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[...] = (20, 60, 120)
+    image[land] = (70, 110, 60)
+    return image
+
+
+# Best wall time of fn() over `repeat` calls and the last result
+def best_time(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# The pre-template way: build the whole figure and savefig it as PNG
+def savefig_render(track_data, cyclone_id, basin):
+    xlim, ylim = tc_plot.track_viewport(track_data)
+    template = tc_plot.TrackFigureTemplate(xlim, ylim, tc_plot.load_basemap())
+    tc_plot.draw_track(template.ax, track_data["Longitude"], track_data["Latitude"], track_data["Intensity"])
+    for key, text in tc_plot.track_texts(track_data, cyclone_id, basin).items():
+        template.texts[key].set_text(text)
+        template.texts[key].set_visible(True)
+    buffer = io.BytesIO()
+    template.fig.savefig(buffer, format="png", bbox_inches="tight")
+    template.close()
+    return buffer.getvalue()
+
+
+def _init_worker(basemap_path):
+    preload_basemap(basemap_path)
+
+
+# One size/case in a fresh worker process; returns a result row
+def bench_case(config):
+    n, case, repeat, savefig = config
+    track_data = parse_trackfile(synthetic_track(n, case))
+    cyclone_id, basin = track_data["Id"].iloc[0], track_data["Id"].iloc[0][:2].lower()
+    row = {"fixes": n, "case": case, "rss_start_mb": peak_rss_mb()}
+
+    # First draw builds the figure template for the viewport, later ones reuse it
+    start = time.perf_counter()
+    image = tc_plot.rasterize_cyclone_track(track_data, cyclone_id, basin)
+    row["draw_cold_ms"] = (time.perf_counter() - start) * 1000
+    row["draw_ms"] = best_time(lambda: tc_plot.rasterize_cyclone_track(track_data, cyclone_id, basin), repeat)[0] * 1000
+    row["rss_draw_mb"] = peak_rss_mb()
+
+    if savefig:
+        seconds, png = best_time(lambda: savefig_render(track_data, cyclone_id, basin), max(1, repeat // 2))
+        row["savefig_png_ms"] = seconds * 1000
+        row["savefig_png_kb"] = len(png) / 1024
+        row["rss_savefig_mb"] = peak_rss_mb()
+
+    # Every output format on its own, then all of them as the pipeline encodes them
+    for variant in tc_plot.OUTPUT_VARIANTS:
+        seconds, encoded = best_time(lambda: tc_plot.encode_variants(image, [variant]), repeat)
+        if encoded:
+            row[f"encode{variant[0]}_ms"] = seconds * 1000
+            row[f"size{variant[0]}_kb"] = len(encoded[variant[0]]) / 1024
+    row["encode_all_ms"] = best_time(lambda: tc_plot.encode_variants(image), repeat)[0] * 1000
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the track renderer offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-savefig", action="store_true", help="skip the full savefig comparison")
+    parser.add_argument("--basemap-width", type=int, default=4096, help="width of the stand-in basemap in pixels")
+    parser.add_argument("--json", help="append the result rows to this JSON Lines file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        basemap_path = os.path.join(tmp, "basemap.npy")
+        np.save(basemap_path, stand_in_basemap(args.basemap_width))
+
+        configs = [(n, case, args.repeat, not args.no_savefig) for case in args.cases for n in args.sizes]
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(1, initializer=_init_worker, initargs=(basemap_path,), maxtasksperchild=1) as pool:
+            rows = pool.map(bench_case, configs, chunksize=1)
+
+    columns = ["fixes", "case", "draw_cold_ms", "draw_ms", "savefig_png_ms"] + \
+        [f"encode{variant[0]}_ms" for variant in tc_plot.OUTPUT_VARIANTS] + ["encode_all_ms", "peak_rss_mb"]
+    columns = [column for column in columns if any(column in row for row in rows)]
+    print(" ".join(f"{column:>16}" for column in columns))
+    for row in rows:
+        cells = [row.get(column, float("nan")) for column in columns]
+        print(" ".join(f"{cell:>16.1f}" if isinstance(cell, float) else f"{cell:>16}" for cell in cells))
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
@@ -0,0 +1,73 @@
+import argparse
+import time
+import pandas as pd
+import numpy as np
+from io import StringIO
+
+from tc_trackfile import parse_trackfile
+
+# Micro-benchmark of parse_trackfile against the per-row parsing the tc scripts used,
+# on synthetic trackfiles. Run: python bench_trackfile.py [--sizes 10 100 ...]
+
+
+# Build a synthetic trackfile (newest fix first, like NRL) with n fixes
+def synthetic_trackfile(n, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp("2024-06-01") + pd.to_timedelta(np.arange(n) * 6, unit="h")
+    lats = np.clip(10 + np.cumsum(rng.normal(0.2, 0.3, n)), -60, 60)
+    lons = (80 + np.cumsum(rng.normal(-0.3, 0.4, n)) + 180) % 360 - 180
+    winds = rng.integers(15, 160, n)
+    pressures = 1010 - winds // 2
+
+    lines = [
+        f"IO012024 TEST {t:%y%m%d} {t:%H%M} {abs(lat):.1f}{'S' if lat < 0 else 'N'} "
+        f"{abs(lon):.1f}{'W' if lon < 0 else 'E'} IO {wind} {mslp}"
+        for t, lat, lon, wind, mslp in zip(times, lats, lons, winds, pressures)
+    ]
+    return "\n".join(reversed(lines)) + "\n"
+
+
+# The parsing code previously copied into every tc script
+def parse_trackfile_per_row(text):
+    columns = ["Id", "Name", "Date", "Time", "Latitude", "Longitude", "Basin", "Intensity", "Pressure"]
+    df = pd.read_csv(StringIO(text), sep=r'\s+', header=None, names=columns)
+    df['Time'] = df['Time'].astype(int).apply(lambda x: f"{x//100:02}:{x%100:02}")
+    df['Date'] = df['Date'].astype(str).apply(lambda x: f"20{x[:2]}-{x[2:4]}-{x[4:]}")
+    df = df.iloc[::-1].reset_index(drop=True)
+    df['Synoptic Time'] = pd.to_datetime(df['Date'] + ' ' + df['Time'])
+    df = df.drop(columns=['Date', 'Time'])
+    df['Latitude'] = df['Latitude'].apply(lambda lat: -float(lat[:-1]) if lat.endswith('S') else float(lat[:-1]))
+    df['Longitude'] = df['Longitude'].apply(lambda lon: -float(lon[:-1]) if lon.endswith('W') else float(lon[:-1]))
+    return df[['Id', 'Name', 'Synoptic Time', 'Latitude', 'Longitude', 'Intensity', 'Pressure']]
+
+
+# Best wall time of fn(arg) over a few repeats
+def best_time(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NRL trackfile parser")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fixes':>8} {'per-row ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for n in args.sizes:
+        text = synthetic_trackfile(n)
+        data = text.encode()
+
+        # Both parsers must agree before their timings mean anything
+        old = parse_trackfile_per_row(text)
+        new = parse_trackfile(data)
+        assert np.allclose(old["Latitude"], new["Latitude"]) and np.allclose(old["Longitude"], new["Longitude"])
+        assert (old["Synoptic Time"].values == new["Synoptic Time"].values).all()
+
+        t_old = best_time(parse_trackfile_per_row, text, args.repeat)
+        t_new = best_time(parse_trackfile, data, args.repeat)
+        print(f"{n:>8} {t_old * 1000:>12.2f} {t_new * 1000:>14.2f} {t_old / t_new:>7.1f}x")
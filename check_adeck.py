@@ -0,0 +1,100 @@
+import argparse
+import gzip
+import os
+import pandas as pd
+import numpy as np
+
+from tc_adeck import load_adeck, latest_guidance, consensus_track, fetch_guidance
+from tc_plot import track_viewport, figure_template
+
+# Offline check of the a-deck parser on the bundled tc_adeck_sample.dat: a WP storm
+# crossing the dateline with short (10-column), wind-radii and full-length lines,
+# repeated 34/50/64 kt radii lines, CARQ/SHIP lines that are no track guidance,
+# an unset 0N 0E position, a late model of the previous cycle and a stale model.
+# Run: python check_adeck.py [path]
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tc_adeck_sample.dat")
+
+LATEST_INIT = pd.Timestamp("2025-10-06 12:00")
+TRACK_AIDS = {"JTWC", "AVNI", "HWFI", "EMXI", "CMCI", "EMX2", "NVGI"}
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"ok  {message}")
+
+
+def check_sample(path):
+    adeck = load_adeck(path)
+    check(set(adeck["Technique"]) == TRACK_AIDS, "CARQ, SHIP and unset positions are dropped")
+    check(not adeck.duplicated(["Technique", "Init", "Tau"]).any(), "one row per technique, init and tau (radii lines merged)")
+    check(len(adeck) == 7 * 6, "every track aid keeps its 6 forecast hours")
+
+    # Short lines and radii lines of the same cycle read the same way
+    for technique in ("AVNI", "HWFI", "EMXI"):
+        rows = adeck[(adeck["Technique"] == technique) & (adeck["Init"] == LATEST_INIT)]
+        check(list(rows["Tau"]) == [0, 12, 24, 36, 48, 60], f"{technique} taus parsed")
+    jtwc = adeck[adeck["Technique"] == "JTWC"].set_index("Tau")
+    check(jtwc.loc[12, "Longitude"] == 179.0 and jtwc.loc[36, "Longitude"] == -179.0, "longitudes signed across the dateline")
+    check(jtwc.loc[36, "Valid Time"] == LATEST_INIT + pd.Timedelta(hours=36), "valid time = init + tau")
+
+    # Same result from gzipped bytes and from small chunks that start with longer lines
+    with open(path, "rb") as f:
+        data = f.read()
+    check(load_adeck(gzip.compress(data)).equals(adeck), "gzipped bytes give the same frame")
+    check(load_adeck(path, chunksize=7).equals(adeck), "chunked reading gives the same frame")
+    check(set(load_adeck(path, since="2025-10-06 06:00")["Technique"]) == TRACK_AIDS - {"NVGI"}, "inits before `since` are skipped")
+
+    guidance = latest_guidance(adeck)
+    newest = guidance.groupby("Technique")["Init"].max()
+    check("NVGI" not in newest and newest["EMX2"] == LATEST_INIT - pd.Timedelta(hours=6), "late model kept, stale model dropped")
+
+    consensus = consensus_track(guidance)
+    check(list(consensus["Members"]) == [4] * 6, "consensus of the 4 models of the latest cycle")
+    lons = consensus["Longitude"].to_numpy()
+    steps = (np.diff(lons) + 180) % 360 - 180
+    check(((steps > 0.5) & (steps < 1.5)).all(), "consensus moves east across the dateline without jumping")
+    check(abs(lons[3] + 179.1) < 0.05, "consensus longitude averaged on the circle")
+
+    # Through fetch_guidance as a local a-deck source: the second call sees no change
+    state, first = fetch_guidance(None, "wp262025", "2025-10-06 12:00", url=path)
+    check(first is not None and first.equals(guidance), "fetch_guidance returns the latest guidance")
+    check(fetch_guidance(None, "wp262025", "2025-10-06 12:00", state, url=path)[1] is None, "unchanged a-deck gives no new guidance")
+    check_dateline_map(guidance)
+
+
+# The plume runs past 180E: the viewport goes beyond the dateline and the basemap
+# must wrap around to fill it (a navy world map here, so blank white shows up)
+def check_dateline_map(guidance):
+    track = pd.DataFrame({
+        "Id": "26W",
+        "Name": "TESTNAME",
+        "Synoptic Time": pd.date_range("2025-10-05 12:00", LATEST_INIT, freq="6h"),
+        "Latitude": [17.6, 18.2, 18.8, 19.4, 20.0],
+        "Longitude": [172.0, 173.5, 175.0, 176.5, 178.0],
+        "Intensity": [45, 55, 60, 65, 70],
+        "Pressure": [994, 988, 984, 980, 975],
+    })
+    xlim, ylim = track_viewport(track, forecast=guidance)
+    check(xlim[1] > 180, "viewport of the plume extends past 180E")
+
+    world = np.empty((180, 360, 3), dtype=np.uint8)
+    world[...] = (20, 60, 140)
+    template = figure_template(xlim, ylim, background_image=world, dpi=50)
+    ax = template.ax
+    left, right, _, _ = ax.images[0].get_extent()
+    check(left <= ax.get_xlim()[0] and right >= ax.get_xlim()[1], "basemap crop spans the whole viewport")
+
+    canvas = template.fig.canvas
+    canvas.restore_region(template.background)
+    pixels = np.asarray(canvas.buffer_rgba())
+    for x in (0.02, 0.5, 0.98):
+        column, row = ax.transAxes.transform((x, 0.5))
+        check(tuple(pixels[int(pixels.shape[0] - row), int(column), :3]) != (255, 255, 255), f"map drawn at {x:.0%} of the axes width")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the a-deck parser against the bundled sample")
+    parser.add_argument("path", nargs="?", default=SAMPLE_FILE)
+    args = parser.parse_args()
+    check_sample(args.path)
@@ -0,0 +1,91 @@
+import tempfile
+import shutil
+import os
+
+# Offline check that a storm living from December into January is archived in
+# one season directory, whether the 3-hourly run or tc_backfill.py stores it,
+# and that backfill IDs NRL has no trackfile for are not requested on every run.
+# Run: python check_archive.py
+ROOT = tempfile.mkdtemp(prefix="tc_check_")
+os.environ["TC_ARCHIVE_DIR"] = os.path.join(ROOT, "archive")
+os.environ["TC_CACHE_DIR"] = os.path.join(ROOT, ".cache")
+
+from datetime import datetime
+
+from tc_archive import list_storms, load_meta
+from tc_backfill import backfill
+from tc_pipeline import archive_storm, season_year
+from tc_season import update_stats
+from tc_trackfile import parse_trackfile
+
+# WP262025 from 30 December 2025 to 3 January 2026, newest fix first as NRL writes it
+TRACKFILE = "\n".join(
+    f"26W FUNGWONG {date} {hour:02}00 {lat:.1f}N {lon:.1f}E WPAC {wind} {pressure}"
+    for date, hour, lat, lon, wind, pressure in reversed([
+        (251230, 0, 8.0, 150.0, 25, 1006),
+        (251230, 12, 8.6, 148.8, 35, 1000),
+        (251231, 0, 9.3, 147.5, 45, 994),
+        (251231, 12, 10.1, 146.1, 60, 985),
+        (260101, 0, 11.0, 144.6, 75, 975),
+        (260101, 12, 12.0, 143.2, 90, 962),
+        (260102, 0, 13.1, 142.0, 100, 955),
+        (260102, 12, 14.3, 141.1, 85, 966),
+        (260103, 0, 15.6, 140.5, 65, 980),
+    ])
+) + "\n"
+
+
+class TrackfileResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+
+# NRL stand-in with only WP262025; every request is logged in `urls`
+class TrackfileSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if "/WP262025/" in url:
+            return TrackfileResponse(200, TRACKFILE.encode())
+        return TrackfileResponse(404)
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"ok  {message}")
+
+
+def check_new_year_storm():
+    check(season_year("wp", datetime(2026, 1, 3)) == "2026", "NRL directory of a January run is tc2026")
+
+    # The 3-hourly run archives the storm on 3 January, backfill of the 2025 season again
+    archive_storm("wp", "WP262025", parse_trackfile(TRACKFILE))
+    check(backfill("wp", 2025, 2025, 26, 26, force=True, session=TrackfileSession()) == 0, "backfill of the 2025 season")
+
+    check(list_storms(["wp"]) == [("wp", 2025, "wp262025")], "one archive directory, in the storm's 2025 season")
+    check(load_meta("wp", 2025, "wp262025")["fixes"] == 9, "fixes of both years kept")
+    stats = update_stats(["wp"])
+    check(len(stats) == 1 and set(stats["Season"]) == {2025}, "season statistics count the storm once")
+
+
+def check_backfill_misses():
+    session = TrackfileSession()
+    check(backfill("wp", 2025, 2025, 26, 28, session=session) == 0 and len(session.urls) == 2, "backfill asks for the two unknown IDs")
+    session.urls.clear()
+    backfill("wp", 2025, 2025, 26, 28, session=session)
+    check(session.urls == [], "IDs not found are not asked for again on the next run")
+    backfill("wp", 2025, 2025, 26, 28, force=True, session=session)
+    check(len(session.urls) == 3, "--force asks for every ID again")
+
+
+if __name__ == "__main__":
+    try:
+        check_new_year_storm()
+        check_backfill_misses()
+    finally:
+        shutil.rmtree(ROOT, ignore_errors=True)
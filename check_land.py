@@ -0,0 +1,76 @@
+import argparse
+import sys
+
+from tc_basemap import load_basemap, preload_basemap
+from tc_cities import load_cities
+from tc_land import land_rasters, classify
+
+# Offline check of the land/sea rasters built from the basemap colours (tc_land):
+# every gazetteer city must come out as land or within CITY_COAST_KM of the
+# coast, and the open-ocean and shelf points below as sea. Run it against the
+# cached basemap after it changes, or whenever WATER_BLUE_MARGIN is tuned.
+# Run: python check_land.py [path to a cached basemap_*.npy]
+CITY_COAST_KM = 10
+
+# Open ocean and shallow, cyan or sediment-laden shelf water, at least ~50 km offshore
+SEA_POINTS = [
+    ("northern Bay of Bengal", 21.0, 90.0),
+    ("Bay of Bengal off Odisha", 20.0, 88.0),
+    ("Gulf of Martaban", 15.5, 97.0),
+    ("Andaman Sea", 12.0, 96.0),
+    ("Arabian Sea off Gujarat", 20.0, 70.0),
+    ("Persian Gulf", 27.0, 51.5),
+    ("Gulf of Thailand", 10.0, 102.0),
+    ("South China Sea", 15.0, 115.0),
+    ("off the Yangtze mouth", 31.0, 122.5),
+    ("Yellow Sea", 36.0, 123.5),
+    ("Bohai Sea", 38.8, 120.0),
+    ("East China Sea", 30.0, 125.0),
+    ("Philippine Sea", 15.0, 130.0),
+    ("Arafura Sea", -10.5, 133.0),
+    ("Gulf of Carpentaria", -14.0, 139.0),
+    ("Coral Sea", -18.0, 152.0),
+    ("South Pacific", -15.0, 170.0),
+    ("Mozambique Channel", -20.0, 40.0),
+    ("South Indian Ocean", -15.0, 80.0),
+    ("Louisiana shelf", 28.5, -91.0),
+    ("Bay of Campeche", 20.0, -94.0),
+    ("Caribbean Sea", 15.0, -75.0),
+    ("North Atlantic", 25.0, -50.0),
+    ("Gulf of California", 27.0, -111.0),
+    ("Central Pacific", 15.0, -155.0),
+]
+
+
+def check_rasters(rasters):
+    failures = 0
+
+    cities = load_cities()
+    over_land, coast_km = classify(cities["latitude"], cities["longitude"], rasters)
+    for (_, city), land, km in zip(cities.iterrows(), over_land, coast_km):
+        ok = land or km <= CITY_COAST_KM
+        failures += not ok
+        where = "on land" if land else f"{km:.0f} km offshore"
+        print(f"{'ok ' if ok else 'FAIL'} {city['name']} ({city['country']}) {where}")
+
+    names, lats, lons = zip(*SEA_POINTS)
+    over_land, coast_km = classify(lats, lons, rasters)
+    for name, land, km in zip(names, over_land, coast_km):
+        ok = not land and km > 0
+        failures += not ok
+        print(f"{'ok ' if ok else 'FAIL'} {name} at sea ({km:+.0f} km from the coast)")
+
+    print(f"{failures} misclassified point(s).")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the basemap land mask against known land and sea points")
+    parser.add_argument("basemap", nargs="?", help="cached basemap_*.npy (default: the current cached basemap)")
+    args = parser.parse_args()
+
+    rasters = land_rasters(preload_basemap(args.basemap) if args.basemap else load_basemap())
+    if rasters is None:
+        print("No cached basemap to check.")
+        sys.exit(1)
+    sys.exit(1 if check_rasters(rasters) else 0)
@@ -1,14 +1,15 @@
 import requests
-import pandas as pd
-from io import StringIO, BytesIO
+from io import BytesIO
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 from datetime import datetime
 from PIL import Image
-import numpy as np
 import ftplib
 import os
-import io
+
+from tc_basemap import load_basemap, show_basemap
+from tc_plot import draw_track
+from tc_trackfile import parse_trackfile
 
 
 # Editable options
@@ -54,17 +55,8 @@ def plot_cyclone_track(track_data, cyclone_id, zoom_out_factor=1.5):
     ]
     
 
-    # Load the background image from the URL
-    image_url = "https://cdn.trackgen.codingcactus.codes/map.jpg"
-    img_response = requests.get(image_url)
-
-    if img_response.status_code == 200:
-        img = Image.open(io.BytesIO(img_response.content))
-        img = img.resize((int(img.width / 2), int(img.height / 2)), Image.Resampling.LANCZOS)  # Downscale by 2x
-        background_image = np.array(img)
-    else:
-        print(f"Failed to retrieve the image. Status code: {img_response.status_code}")
-        background_image = np.zeros((1000, 1000, 3))  # Placeholder in case of error
+    # Load the background image (cached on disk, see tc_basemap.py)
+    background_image = load_basemap()
   
 
     
@@ -95,49 +87,16 @@ def plot_cyclone_track(track_data, cyclone_id, zoom_out_factor=1.5):
     ax.set_xlim(lon_min_zoomed, lon_max_zoomed)
     ax.set_ylim(lat_min_zoomed, lat_max_zoomed)
 
-    # Set the extent of the background image to cover the entire world
-    world_extent = [-180, 180, -90, 90]  # Extent for the entire world map
-    ax.imshow(background_image, extent=world_extent, aspect='auto', zorder=0)
-
- 
-# Set the aspect ratio to be equal
+    # Set the aspect ratio to be equal
     ax.set_aspect('equal', adjustable='datalim')
 
+    # Draw only the part of the world map inside the zoomed region
+    show_basemap(ax, background_image)
+
     
 
-    # Initialize variables for the first point
-    prev_lat = track_data["Latitude"].iloc[0]
-    prev_lon = track_data["Longitude"].iloc[0]
-
-    # Plot the cyclone track with conditional marker color and default black line color 
-    for i, (lat, lon, intensity) in enumerate(zip(track_data["Latitude"], track_data["Longitude"], track_data["Intensity"])):
-        if intensity > 136:
-            marker_color = 'mediumpurple'
-        elif intensity > 113:
-            marker_color = 'magenta'
-        elif intensity > 96:
-            marker_color = 'tomato'
-        elif intensity > 83:
-            marker_color = 'gold'
-        elif intensity > 63:
-            marker_color = 'lemonchiffon'
-        elif intensity > 33:
-            marker_color = 'aqua'
-        elif intensity > 27:
-            marker_color = 'deepskyblue'
-        elif intensity > 22:
-            marker_color = 'steelblue'
-        else:
-            marker_color = 'lime'
-
-        # Adjust marker size for the last point
-        
-        marker_size = 9  # Default size for other points
-
-        ax.plot([prev_lon, lon], [prev_lat, lat], linestyle='-', color='white', linewidth=0.6, zorder=1)
-        ax.plot(lon, lat, marker='o', color=marker_color, markersize=marker_size, zorder=2, mec='k')
-        prev_lat = lat
-        prev_lon = lon
+    # Plot the cyclone track with category-colored markers
+    draw_track(ax, track_data["Longitude"], track_data["Latitude"], track_data["Intensity"], last_marker_size=9)
 
     # Add the title and legend
     observed_start_time = track_data['Synoptic Time'].iloc[0].strftime("%HZ %d-%b-%Y")
@@ -215,24 +174,8 @@ for cyclone_id in tc_ids:
     if response2.status_code == 200:
         print(f"Data fetched from {url2}.\n")
 
-        # Define column names
-        columns = ["Id", "Name", "Date", "Time", "Latitude", "Longitude", "Basin", "Intensity", "Pressure"]
-        data = StringIO(response2.text)
-        df = pd.read_csv(data, delim_whitespace=True, header=None, names=columns)
-
-        # Process Date and Time columns
-        df['Time'] = df['Time'].astype(int).apply(lambda x: f"{x//100:02}:{x%100:02}")
-        df['Date'] = df['Date'].astype(str).apply(lambda x: f"20{x[:2]}-{x[2:4]}-{x[4:]}")
-        df = df.iloc[::-1].reset_index(drop=True)
-        df['Synoptic Time'] = pd.to_datetime(df['Date'] + ' ' + df['Time'])
-        df = df.drop(columns=['Date', 'Time'])
-
-        # Convert Latitude and Longitude to appropriate signs
-        df['Latitude'] = df['Latitude'].apply(lambda lat: -float(lat[:-1]) if lat.endswith('S') else float(lat[:-1]))
-        df['Longitude'] = df['Longitude'].apply(lambda lon: -float(lon[:-1]) if lon.endswith('W') else float(lon[:-1]))
-
-        # Reorder and filter columns
-        df = df[['Id', 'Name', 'Synoptic Time', 'Latitude', 'Longitude', 'Intensity', 'Pressure']]
+        # Parse the trackfile (newest fix last, signed lat/lon)
+        df = parse_trackfile(response2.content)
 
         # Output cyclone information
         cyclone_name = df['Name'].iloc[0]
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import gzip
+import io
+import os
+
+from tc_trackfile import _signed
+from tc_fetch import TIMEOUT
+from tc_timing import stage
+from tc_state import conditional_headers, content_hash, record_miss, miss_due
+
+# ATCF a-deck of a storm: one comma-separated line per technique, init time and
+# forecast hour (tau), repeated for each wind-radii threshold. Any local path or
+# URL pattern with {basin}, {number} and {year} works, e.g. a directory of
+# fixture files; an empty TC_ADECK_URL turns forecast guidance off.
+ADECK_URL = os.environ.get("TC_ADECK_URL", "https://hurricanes.ral.ucar.edu/repository/data/adecks_open/{year}/a{basin}{number}{year}.dat")
+
+# Only the leading a-deck columns are read: basin, number, init (YYYYMMDDHH),
+# technique number, technique, tau, latitude, longitude, wind (kt), pressure (mb)
+ADECK_COLUMNS = [0, 1, 2, 4, 5, 6, 7, 8, 9]
+ADECK_NAMES = ["Basin", "Number", "Init", "Technique", "Tau", "Latitude", "Longitude", "Intensity", "Pressure"]
+ADECK_CHUNK_ROWS = 100_000
+
+# Best-track, CARQ/warning lines and intensity-only or climatology aids are no track guidance
+EXCLUDED_TECHNIQUES = {"CARQ", "WRNG", "BEST", "CLIP", "CLP5", "TCLP", "OCD5", "DRCL", "SHIP", "DSHP", "LGEM", "SHF5", "DSF5", "RVCN", "IVCN"}
+
+# Official forecasts, drawn on top of the plume
+OFFICIAL_TECHNIQUES = ("OFCL", "JTWC")
+
+# Models of an older cycle (late models) are kept when at most this much older than the latest init
+LATE_HOURS = 6
+MAX_TAU = 120
+
+# Forecast times with fewer models get no consensus position
+CONSENSUS_MIN_MEMBERS = 3
+
+
+# a-deck file or URL of a storm, e.g. al052025 -> .../2025/aal052025.dat
+def adeck_source(tc_id, url=ADECK_URL):
+    tc_id = tc_id.lower()
+    return url.format(basin=tc_id[:2], number=tc_id[2:4], year=tc_id[4:8]) if url else None
+
+
+# Parse an a-deck (path, bytes or file object, optionally gzipped) in chunks of
+# ADECK_CHUNK_ROWS, reading only ADECK_COLUMNS. Each chunk is filtered by technique
+# (default: all track aids) and by init time (>= since) before it is converted,
+# and the repeated wind-radii lines are dropped. Returns one row per technique,
+# init and tau: Technique, Init, Tau, Valid Time, Latitude, Longitude, Intensity, Pressure.
+def load_adeck(source, techniques=None, since=None, chunksize=ADECK_CHUNK_ROWS):
+    if isinstance(source, bytes):
+        source = io.BytesIO(gzip.decompress(source) if source[:2] == b"\x1f\x8b" else source)
+    techniques = {technique.upper() for technique in techniques} if techniques else None
+    since = int(pd.Timestamp(since).strftime("%Y%m%d%H")) if since is not None else None
+
+    parts = []
+    reader = pd.read_csv(source, header=None, usecols=ADECK_COLUMNS, dtype=str, skipinitialspace=True,
+                         chunksize=chunksize, compression="infer" if isinstance(source, str) else None)
+    for chunk in reader:
+        chunk.columns = ADECK_NAMES
+        chunk = chunk.dropna(subset=["Init", "Technique", "Tau", "Latitude", "Longitude"])
+        technique = chunk["Technique"].str.upper()
+        keep = ~technique.isin(EXCLUDED_TECHNIQUES) if techniques is None else technique.isin(techniques)
+        init = pd.to_numeric(chunk["Init"], errors="coerce")
+        if since is not None:
+            keep &= init >= since
+        chunk = chunk[keep.to_numpy() & init.notna().to_numpy()]
+        if len(chunk):
+            parts.append(chunk.assign(Technique=technique[chunk.index]))
+
+    columns = ["Technique", "Init", "Tau", "Valid Time", "Latitude", "Longitude", "Intensity", "Pressure"]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(parts, ignore_index=True)
+
+    # One line per technique/init/tau (the 34/50/64 kt radii lines repeat the position)
+    df = df.drop_duplicates(["Technique", "Init", "Tau"], keep="first")
+    init = pd.to_datetime(df["Init"], format="%Y%m%d%H")
+    tau = pd.to_numeric(df["Tau"], errors="coerce")
+    frame = pd.DataFrame({
+        "Technique": df["Technique"].to_numpy(),
+        "Init": init.to_numpy(),
+        "Tau": tau.to_numpy(),
+        "Valid Time": (init + pd.to_timedelta(tau, unit="h")).to_numpy(),
+        "Latitude": _signed(df["Latitude"], "S") / 10,
+        "Longitude": _signed(df["Longitude"], "W") / 10,
+        "Intensity": pd.to_numeric(df["Intensity"], errors="coerce").to_numpy(),
+        "Pressure": pd.to_numeric(df["Pressure"], errors="coerce").to_numpy(),
+    }, columns=columns)
+    # Unset positions are written as 0N 0E
+    frame = frame[(frame["Tau"] >= 0) & ~((frame["Latitude"] == 0) & (frame["Longitude"] == 0))]
+    return frame.sort_values(["Technique", "Init", "Tau"]).reset_index(drop=True)
+
+
+# Latest guidance of every technique: its newest init, if at most LATE_HOURS older
+# than the newest init of any technique, up to MAX_TAU
+def latest_guidance(adeck, late_hours=LATE_HOURS, max_tau=MAX_TAU):
+    if not len(adeck):
+        return adeck
+    newest = adeck.groupby("Technique")["Init"].transform("max")
+    guidance = adeck[(adeck["Init"] == newest) & (newest >= adeck["Init"].max() - pd.Timedelta(hours=late_hours))]
+    return guidance[guidance["Tau"] <= max_tau].reset_index(drop=True)
+
+
+# Mean position of the non-official models at every valid time with at least
+# min_members of them. Longitudes are averaged on the circle, so tracks across
+# the dateline stay together. Returns Valid Time, Latitude, Longitude, Intensity, Members.
+def consensus_track(guidance, min_members=CONSENSUS_MIN_MEMBERS):
+    models = guidance[~guidance["Technique"].isin(OFFICIAL_TECHNIQUES)]
+    lon = np.radians(models["Longitude"].to_numpy(dtype="float64"))
+    grouped = models.assign(_sin=np.sin(lon), _cos=np.cos(lon)).groupby("Valid Time")
+    mean = grouped.agg(Latitude=("Latitude", "mean"), _sin=("_sin", "mean"), _cos=("_cos", "mean"),
+                       Intensity=("Intensity", "mean"), Members=("Technique", "nunique"))
+    mean = mean[mean["Members"] >= min_members]
+    return pd.DataFrame({
+        "Valid Time": mean.index,
+        "Latitude": mean["Latitude"].to_numpy(),
+        "Longitude": np.degrees(np.arctan2(mean["_sin"], mean["_cos"])).to_numpy(),
+        "Intensity": mean["Intensity"].round().to_numpy(),
+        "Members": mean["Members"].to_numpy(),
+    })
+
+
+# The 404 back-off of an a-deck state, for a request that wants the whole
+# a-deck again but should not ask for a missing one before its time
+def miss_state(entry):
+    return {key: entry[key] for key in ("misses", "checked") if key in (entry or {})}
+
+
+# Fingerprint of a latest_guidance frame, to tell whether a changed a-deck changes the plume
+def guidance_hash(guidance):
+    return content_hash(guidance.to_csv(index=False).encode())
+
+
+# Latest guidance for a storm from its a-deck (fetched with the run's session
+# when the source is a URL, conditionally on `entry`, the a-deck state of the
+# last render). Only inits from a day before last_fix on are parsed.
+# Returns None when the storm has no a-deck source, otherwise (new a-deck state,
+# guidance) where guidance is None when neither the a-deck nor its latest
+# guidance changed since `entry`. A 404 is kept in the state and not asked
+# again before its back-off interval (see tc_state.miss_due) has passed.
+def fetch_guidance(session, tc_id, last_fix, entry=None, url=ADECK_URL):
+    entry = entry or {}
+    source = adeck_source(tc_id, url)
+    if source is None:
+        return None
+    headers = {}
+    if source.startswith(("http://", "https://")):
+        if not miss_due(entry):
+            return entry, None
+        with stage("adeck_fetch", tc_id) as timing:
+            response = session.get(source, headers=conditional_headers(entry), timeout=TIMEOUT)
+            timing["bytes"] = len(response.content)
+            timing["status"] = response.status_code
+        if response.status_code == 404:
+            return record_miss(entry), None
+        if response.status_code == 304:
+            return entry, None
+        if response.status_code != 200:
+            raise RuntimeError(f"Status code: {response.status_code} for {source}")
+        content, headers = response.content, response.headers
+    elif os.path.exists(source):
+        with open(source, "rb") as f:
+            content = f.read()
+    else:
+        return None
+
+    state = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"), "sha256": content_hash(content)}
+    if entry.get("sha256") == state["sha256"]:
+        return dict(entry, **state), None
+    with stage("adeck_parse", tc_id):
+        guidance = latest_guidance(load_adeck(content, since=pd.Timestamp(last_fix) - pd.Timedelta(hours=24)))
+    state["guidance"] = guidance_hash(guidance)
+    return state, None if entry.get("guidance") == state["guidance"] else guidance
@@ -0,0 +1,16 @@
+import argparse
+import sys
+
+from tc_pipeline import run, BASIN_ORDER
+
+# Render every active storm of all basins (or the basins given on the command line)
+# from a single sector-file fetch, e.g. `python tc_all.py` or `python tc_all.py io wp`
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render and upload the tracks of all active tropical cyclones")
+    parser.add_argument("basins", nargs="*", default=BASIN_ORDER, help="basins to process (default: all)")
+    parser.add_argument("--force", action="store_true", help="re-render storms whose trackfile has not changed")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count, 1 renders in-process)")
+    parser.add_argument("--animate", action="store_true", help="also publish an MP4/GIF loop of every rendered track")
+    args = parser.parse_args()
+
+    sys.exit(1 if run(args.basins, force=args.force, workers=args.workers, animate=args.animate) else 0)
@@ -0,0 +1,174 @@
+import pandas as pd
+import numpy as np
+
+from tc_archive import list_storms, load_meta, load_archive
+
+EARTH_RADIUS_KM = 6371.0
+
+
+# Great-circle distance in km, vectorized over any broadcastable inputs (degrees)
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype="float64")) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+# Lat/lon grid-bucket index over archived fixes (load_archive frame).
+# Fixes are sorted by grid cell so a query only touches the cells around it.
+class TrackIndex:
+    def __init__(self, fixes, cell_deg=2.0):
+        self.cell_deg = cell_deg
+        self.n_lat = int(np.ceil(180 / cell_deg))
+        self.n_lon = int(np.ceil(360 / cell_deg))
+
+        lat = fixes["Latitude"].to_numpy(dtype="float64")
+        lon = fixes["Longitude"].to_numpy(dtype="float64")
+        cells = self._cells(self._lat_bin(lat), self._lon_bin(lon))
+        order = np.argsort(cells, kind="stable")
+
+        self.cells = cells[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.month = fixes["Synoptic Time"].dt.month.to_numpy()[order]
+        self.time = fixes["Synoptic Time"].to_numpy()[order]
+        self.storm_codes, self.storms = pd.factorize(fixes["Id"].to_numpy()[order])
+        self.names = fixes.groupby("Id")["Name"].last()
+        self.seasons = fixes.groupby("Id")["Season"].first()
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _lat_bin(self, lat):
+        return np.clip(((np.asarray(lat) + 90) // self.cell_deg).astype(int), 0, self.n_lat - 1)
+
+    def _lon_bin(self, lon):
+        return (((np.asarray(lon) + 180) % 360) // self.cell_deg).astype(int) % self.n_lon
+
+    def _cells(self, lat_bin, lon_bin):
+        return lat_bin * self.n_lon + lon_bin
+
+    # Indices of all fixes in the cells within radius_km of (lat, lon)
+    def _candidates(self, lat, lon, radius_km):
+        dlat = radius_km / 111.2
+        lat_bins = np.arange(self._lat_bin(lat - dlat), self._lat_bin(lat + dlat) + 1)
+
+        # Widen the longitude window towards the poles, use every column near them
+        coslat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        if coslat < 1e-3 or dlat / coslat >= 180:
+            lon_bins = np.arange(self.n_lon)
+        else:
+            dlon = dlat / coslat
+            span = int(np.ceil(dlon / self.cell_deg)) + 1
+            lon_bins = (self._lon_bin(lon) + np.arange(-span, span + 1)) % self.n_lon
+            lon_bins = np.unique(lon_bins)
+
+        cells = self._cells(lat_bins[:, None], lon_bins[None, :]).ravel()
+        starts = np.searchsorted(self.cells, cells, side="left")
+        stops = np.searchsorted(self.cells, cells, side="right")
+        if not (stops > starts).any():
+            return np.array([], dtype=int)
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, stops) if b > a])
+
+    # Past storms with a fix within radius_km of (lat, lon), closest first
+    def near_point(self, lat, lon, radius_km=300, months=None):
+        idx = self._candidates(lat, lon, radius_km)
+        if months is not None and len(idx):
+            idx = idx[np.isin(self.month[idx], list(months))]
+        dist = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+
+        hits = pd.DataFrame({"storm": self.storm_codes[idx], "distance_km": dist, "time": self.time[idx]})
+        closest = hits.sort_values("distance_km").drop_duplicates("storm")
+        return self._describe(closest.assign(Id=self.storms[closest["storm"].to_numpy()]))
+
+    # Past storms ranked by how much of the given track they shadow: the share of
+    # track points with one of their fixes within radius_km, then mean distance
+    def analogues(self, lats, lons, radius_km=300, months=None, exclude=(), limit=10):
+        lats = np.asarray(lats, dtype="float64")
+        lons = np.asarray(lons, dtype="float64")
+        pairs = []
+        for point, (lat, lon) in enumerate(zip(lats, lons)):
+            idx = self._candidates(lat, lon, radius_km)
+            if len(idx):
+                pairs.append(np.column_stack([np.full(len(idx), point), idx]))
+        if not pairs:
+            return self._describe(pd.DataFrame(columns=["Id", "coverage", "distance_km"]))
+
+        pairs = np.concatenate(pairs)
+        point, idx = pairs[:, 0], pairs[:, 1]
+        dist = haversine_km(lats[point], lons[point], self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        if months is not None:
+            keep &= np.isin(self.month[idx], list(months))
+
+        hits = pd.DataFrame({"storm": self.storm_codes[idx[keep]], "point": point[keep], "distance_km": dist[keep]})
+        # Closest fix of every storm to every track point, then one row per storm
+        per_point = hits.groupby(["storm", "point"])["distance_km"].min().reset_index()
+        ranked = per_point.groupby("storm").agg(points=("point", "size"), distance_km=("distance_km", "mean")).reset_index()
+        ranked["coverage"] = ranked["points"] / len(lats)
+        ranked["Id"] = self.storms[ranked["storm"].to_numpy()]
+        ranked = ranked[~ranked["Id"].isin([tc_id.upper() for tc_id in exclude])]
+        ranked = ranked.sort_values(["coverage", "distance_km"], ascending=[False, True]).head(limit)
+        return self._describe(ranked[["Id", "coverage", "distance_km"]])
+
+    def _describe(self, frame):
+        frame = frame.reset_index(drop=True)
+        frame.insert(1, "Name", self.names.reindex(frame["Id"]).to_numpy())
+        frame.insert(2, "Season", self.seasons.reindex(frame["Id"]).to_numpy())
+        return frame.drop(columns=["storm"], errors="ignore")
+
+
+# Months within `window` months of the given month, wrapping around the year
+def month_window(month, window=1):
+    return {(month - 1 + offset) % 12 + 1 for offset in range(-window, window + 1)}
+
+
+# One index per basin with the fixes and archive versions it was built from
+_indexes = {}
+
+
+# Version of every archived storm of a basin, like tc_season: {(year, tc_id): "fixes|last_fix"}
+def archive_versions(basin):
+    versions = {}
+    for _, year, tc_id in list_storms(basins=[basin]):
+        meta = load_meta(basin, year, tc_id)
+        versions[(year, tc_id)] = f"{meta['fixes']}|{meta['last_fix']}"
+    return versions
+
+
+# Index of a basin's archive, built on first use and rebuilt whenever a storm is
+# added, gains fixes or is removed (e.g. between the polls of tc_daemon). Only
+# the changed storms are re-read; the other fixes come from the previous build.
+def basin_index(basin):
+    versions = archive_versions(basin)
+    cached = _indexes.get(basin)
+    if cached is None or cached["versions"] != versions:
+        old = cached["versions"] if cached else {}
+        stale = [key for key in versions if old.get(key) != versions[key]]
+        fixes = load_archive(storms=[(basin, year, tc_id) for year, tc_id in stale])
+        if cached is not None:
+            # Keep the previous fixes of storms that are unchanged and still archived
+            previous = cached["fixes"]
+            keep = {(year, tc_id.upper()) for (year, tc_id), version in versions.items() if old.get((year, tc_id)) == version}
+            kept = pd.MultiIndex.from_arrays([previous["Season"].astype(int), previous["Id"]]).isin(list(keep))
+            fixes = pd.concat([previous[kept], fixes], ignore_index=True)
+        _indexes[basin] = {
+            "versions": versions,
+            "fixes": fixes,
+            "index": TrackIndex(fixes) if len(fixes) else None,
+        }
+    return _indexes[basin]["index"]
+
+
+# Ranked historical analogues of a parsed track (same basin, nearby months).
+# tc_id is the storm's archive ID (its sector-file ID, which the trackfile's Id
+# column may not match), so the storm itself is never its own analogue.
+def storm_analogues(track_data, basin, tc_id=None, radius_km=300, window=1, limit=5):
+    index = basin_index(basin)
+    if index is None:
+        return None
+    months = month_window(track_data["Synoptic Time"].iloc[-1].month, window)
+    exclude = [tc_id or track_data["Id"].iloc[0]]
+    return index.analogues(track_data["Latitude"], track_data["Longitude"], radius_km, months,
+                           exclude=exclude, limit=limit)
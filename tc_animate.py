@@ -0,0 +1,231 @@
+from matplotlib.lines import Line2D
+from matplotlib.transforms import Bbox
+from PIL import Image
+import pandas as pd
+import numpy as np
+import subprocess
+import tempfile
+import shutil
+import os
+import io
+
+from tc_plot import figure_template, track_viewport, track_texts, peak_texts, draw_track, category_colors, render_cyclone_track
+from tc_timing import stage
+
+# Resolution and speed of the track loops
+ANIMATION_DPI = int(os.environ.get("TC_ANIMATION_DPI", 80))
+ANIMATION_FPS = 12
+ANIMATION_STEP_HOURS = 1
+HOLD_SECONDS = 1.5  # the last frame stays up this long before the loop restarts
+GIF_TRANSPARENT = 255  # palette index left free by quantize(colors=255)
+
+
+# Unit vectors of lat/lon points (degrees)
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+# Resample a parse_trackfile frame to every `step_hours` hours. Positions move
+# along the great circle between consecutive fixes, intensity and pressure are
+# interpolated linearly in time. Returns Synoptic Time, Latitude, Longitude,
+# Intensity, Pressure and Fixes (number of original fixes reached so far).
+def interpolate_track(track_data, step_hours=ANIMATION_STEP_HOURS):
+    track = track_data.drop_duplicates("Synoptic Time", keep="last")
+    time = track["Synoptic Time"].to_numpy(dtype="datetime64[s]").astype("int64")
+    lat = track["Latitude"].to_numpy(dtype="float64")
+    lon = track["Longitude"].to_numpy(dtype="float64")
+    grid = np.arange(time[0], time[-1] + 1, int(step_hours * 3600))
+    if grid[-1] != time[-1]:
+        grid = np.append(grid, time[-1])
+
+    if len(time) > 1:
+        # Segment of every grid time and the fraction of it already covered
+        seg = np.clip(np.searchsorted(time, grid, side="right") - 1, 0, len(time) - 2)
+        frac = (grid - time[seg]) / (time[seg + 1] - time[seg])
+
+        # Spherical linear interpolation between the segment's end points
+        points = _unit_vectors(lat, lon)
+        p0, p1 = points[seg], points[seg + 1]
+        omega = np.arccos(np.clip((p0 * p1).sum(axis=1), -1, 1))
+        sin_omega = np.sin(omega)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w0 = np.where(sin_omega > 1e-9, np.sin((1 - frac) * omega) / sin_omega, 1 - frac)
+            w1 = np.where(sin_omega > 1e-9, np.sin(frac * omega) / sin_omega, frac)
+        p = w0[:, None] * p0 + w1[:, None] * p1
+        grid_lat = np.degrees(np.arctan2(p[:, 2], np.hypot(p[:, 0], p[:, 1])))
+        grid_lon = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+        # Keep longitudes on the same side of the dateline as the track
+        grid_lon += 360 * np.round((lon[seg] - grid_lon) / 360)
+    else:
+        grid_lat, grid_lon = lat[:1], lon[:1]
+
+    return pd.DataFrame({
+        "Synoptic Time": grid.astype("datetime64[s]"),
+        "Latitude": grid_lat,
+        "Longitude": grid_lon,
+        "Intensity": np.interp(grid, time, track["Intensity"].to_numpy(dtype="float64")),
+        "Pressure": np.interp(grid, time, track["Pressure"].to_numpy(dtype="float64")),
+        "Fixes": np.searchsorted(time, grid, side="right"),
+    })
+
+
+# RGB frames of the storm moving along its track, one per interpolated step.
+# The cached figure template provides the basemap crop. Every frame restores the
+# raster of the trail drawn so far (axes area only), adds one trail segment and
+# redraws the fix markers, the storm marker and the wind/pressure box. The
+# peak time and maxima above the axes are redrawn only when a new fix is reached.
+def animation_frames(track_data, cyclone_id, basin, step_hours=ANIMATION_STEP_HOURS, dpi=ANIMATION_DPI, zoom_out_factor=1.5, timing=None):
+    track = track_data.drop_duplicates("Synoptic Time", keep="last").reset_index(drop=True)
+    hourly = interpolate_track(track, step_hours)
+    xlim, ylim = track_viewport(track, zoom_out_factor)
+    template = figure_template(xlim, ylim, dpi=dpi, timing=timing)
+    ax, canvas, fig = template.ax, template.fig.canvas, template.fig
+    renderer = canvas.get_renderer()
+
+    # Reusable artists: the fix markers (sliced per frame), a trail step and the storm
+    lines, markers = draw_track(ax, track["Longitude"], track["Latitude"], track["Intensity"], marker_size=6, last_marker_size=6)
+    lines.remove()
+    offsets, colors = markers.get_offsets().copy(), category_colors(track["Intensity"])
+    step = ax.add_line(Line2D([], [], color='white', linewidth=0.6, zorder=1))
+    storm = ax.add_line(Line2D([], [], marker='o', markersize=12, markeredgecolor='k', linewidth=0, zorder=3))
+    texts = template.texts
+
+    # Strongest fix so far (the first one on ties, like idxmax) after every fix
+    fix_wind = track["Intensity"].to_numpy()
+    running_max = np.maximum.accumulate(fix_wind)
+    new_peak = np.concatenate([[True], fix_wind[1:] > running_max[:-1]])
+    peak_fix = np.maximum.accumulate(np.where(new_peak, np.arange(len(track)), 0))
+
+    # One crop box for all frames (sized for the full track's texts) so the video size stays fixed
+    for key, text in track_texts(track, cyclone_id, basin).items():
+        texts[key].set_text(text)
+        texts[key].set_visible(True)
+    bbox = Bbox.union([template.static_bbox] + [artist.get_window_extent(renderer) for artist in texts.values()])
+
+    canvas.restore_region(template.background)
+    ax.draw_artist(texts["xlabel"])
+    header_bbox = Bbox.from_extents(fig.bbox.x0, ax.bbox.y1 + 2, fig.bbox.x1, fig.bbox.y1)
+    blank_header = canvas.copy_from_bbox(header_bbox)
+
+    time = hourly["Synoptic Time"]
+    lat, lon = hourly["Latitude"].to_numpy(), hourly["Longitude"].to_numpy()
+    wind, pressure, fixes = hourly["Intensity"].to_numpy(), hourly["Pressure"].to_numpy(), hourly["Fixes"].to_numpy()
+    shown_fixes = 0
+    try:
+        trail = canvas.copy_from_bbox(ax.bbox)
+        for k in range(len(hourly)):
+            # Header: title, peak time and maxima of the fixes reached so far
+            if fixes[k] != shown_fixes:
+                shown_fixes = fixes[k]
+                canvas.restore_region(blank_header)
+                peak = peak_fix[shown_fixes - 1]
+                so_far = peak_texts(fix_wind[peak], track["Synoptic Time"].iloc[peak], track["Pressure"].iloc[peak])
+                for key, text in so_far.items():
+                    texts[key].set_text(text)
+                ax.draw_artist(texts["title"])
+                for key in so_far:
+                    ax.draw_artist(texts[key])
+
+            # Trail layer: add the newest step and keep the raster for the next frame
+            canvas.restore_region(trail)
+            if k:
+                step.set_data(lon[k - 1:k + 1], lat[k - 1:k + 1])
+                ax.draw_artist(step)
+                trail = canvas.copy_from_bbox(ax.bbox)
+
+            # Moving layer: fixes passed so far, the storm and its current conditions
+            markers.set_offsets(offsets[:shown_fixes])
+            markers.set_facecolor(colors[:shown_fixes])
+            storm.set_data([lon[k]], [lat[k]])
+            storm.set_markerfacecolor(category_colors(round(wind[k])))
+            texts["info"].set_text(f"WIND SPEED: {wind[k]:.0f}KT | PRESSURE: {pressure[k]:.0f} | {time[k].strftime('%HZ UTC %d-%b-%Y').upper()}")
+            for artist in (markers, storm, texts["info"]):
+                ax.draw_artist(artist)
+            yield template._crop(np.asarray(renderer.buffer_rgba()), bbox)
+    finally:
+        for artist in (markers, step, storm):
+            artist.remove()
+        for artist in texts.values():
+            artist.set_visible(False)
+
+
+# Encode frames into an MP4 (when ffmpeg is installed) and a GIF in one pass.
+# Returns {file suffix: bytes}.
+def encode_loop(frames, fps=ANIMATION_FPS, hold_seconds=HOLD_SECONDS):
+    ffmpeg = shutil.which("ffmpeg")
+    encoder = mp4_path = None
+    gif_frames = []
+    palette = previous = None
+    last = None
+    try:
+        for frame in frames:
+            last = frame
+            if ffmpeg and encoder is None:
+                fd, mp4_path = tempfile.mkstemp(suffix=".mp4")
+                os.close(fd)
+                height, width = frame.shape[:2]
+                encoder = subprocess.Popen([
+                    ffmpeg, "-y", "-loglevel", "error",
+                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                    "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                    "-movflags", "+faststart", mp4_path,
+                ], stdin=subprocess.PIPE)
+            if encoder is not None:
+                encoder.stdin.write(frame.tobytes())
+
+            # GIF frames share the palette of the first frame (fast, no flicker).
+            # Pixels that did not change are made transparent so each frame only
+            # stores what moved; this is much cheaper than Pillow's optimize pass.
+            if palette is None:
+                palette = Image.fromarray(frame).quantize(colors=255)
+                gif_frames.append(palette)
+                previous = np.asarray(palette)
+                continue
+            indices = np.asarray(Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE))
+            delta = np.where(indices == previous, GIF_TRANSPARENT, indices).astype(np.uint8)
+            previous = indices
+            img = Image.fromarray(delta, mode="P")
+            img.putpalette(palette.getpalette())
+            gif_frames.append(img)
+
+        if last is None:
+            return {}
+        hold = max(int(round(hold_seconds * fps)) - 1, 0)
+        encoded = {}
+        if encoder is not None:
+            encoder.stdin.write(last.tobytes() * hold)
+            encoder.stdin.close()
+            if encoder.wait() == 0:
+                with open(mp4_path, "rb") as f:
+                    encoded["_loop.mp4"] = f.read()
+            encoder = None
+
+        buffer = io.BytesIO()
+        durations = [round(1000 / fps)] * len(gif_frames)
+        durations[-1] += round(1000 * hold / fps)
+        gif_frames[0].save(buffer, format="GIF", save_all=True, append_images=gif_frames[1:], duration=durations,
+                           loop=0, disposal=1, transparency=GIF_TRANSPARENT, optimize=False)
+        encoded["_loop.gif"] = buffer.getvalue()
+        return encoded
+    finally:
+        if encoder is not None:
+            encoder.kill()
+            encoder.wait()
+        if mp4_path:
+            os.remove(mp4_path)
+
+
+# Function to render the track loop of a storm, returns {file suffix: encoded bytes}
+def animate_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor=1.5, storm=None):
+    with stage("animate", storm or cyclone_id) as timing:
+        loop = encode_loop(animation_frames(track_data, cyclone_id, basin, zoom_out_factor=zoom_out_factor, timing=timing))
+        timing["bytes"] = sum(len(data) for data in loop.values())
+    return loop
+
+
+# Still images plus the track loop, for render_many(..., render=render_with_loop)
+def render_with_loop(track_data, cyclone_id, basin, zoom_out_factor=1.5, forecast=None, storm=None):
+    variants = render_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor, forecast, storm)
+    variants.update(animate_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor, storm))
+    return variants
@@ -0,0 +1,113 @@
+import pandas as pd
+import numpy as np
+import shutil
+import json
+import os
+
+# Local archive of parsed best-track fixes, one directory per storm:
+#   archive/<basin>/<season year>/<storm id>/<column>.npy  (+ meta.json)
+# Each column is a plain .npy file so readers can memory-map just what they need.
+ARCHIVE_DIR = os.environ.get("TC_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+
+# parse_trackfile column -> (file name, dtype on disk)
+COLUMNS = {
+    "Synoptic Time": ("time", "datetime64[s]"),
+    "Latitude": ("lat", "float32"),
+    "Longitude": ("lon", "float32"),
+    "Intensity": ("wind", "int16"),
+    "Pressure": ("pressure", "int16"),
+}
+
+
+# Season year of a storm from its ID, e.g. WP262025 -> 2025. A storm keeps its
+# season when it lives into the next calendar year.
+def storm_season(tc_id):
+    return int(tc_id[4:8])
+
+
+def storm_dir(basin, year, tc_id, root=ARCHIVE_DIR):
+    return os.path.join(root, basin.lower(), str(year), tc_id.lower())
+
+
+def has_storm(basin, year, tc_id, root=ARCHIVE_DIR):
+    return os.path.exists(os.path.join(storm_dir(basin, year, tc_id, root), "meta.json"))
+
+
+# Write (or replace) the fixes of one storm, as returned by parse_trackfile
+def save_storm(basin, year, tc_id, track_data, root=ARCHIVE_DIR):
+    path = storm_dir(basin, year, tc_id, root)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    for column, (name, dtype) in COLUMNS.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), track_data[column].to_numpy().astype(dtype))
+    meta = {
+        "id": str(track_data["Id"].iloc[0]),
+        "name": str(track_data["Name"].iloc[-1]),
+        "fixes": len(track_data),
+        "last_fix": track_data["Synoptic Time"].iloc[-1].isoformat(),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    # Swap the finished directory in so readers never see half a storm
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+# Storm directories in the archive as (basin, year, tc_id) tuples
+def list_storms(basins=None, years=None, root=ARCHIVE_DIR):
+    storms = []
+    if not os.path.isdir(root):
+        return storms
+    for basin in sorted(os.listdir(root)):
+        if basins and basin not in basins:
+            continue
+        for year in sorted(os.listdir(os.path.join(root, basin))):
+            if not year.isdigit() or (years and int(year) not in years):
+                continue
+            for tc_id in sorted(os.listdir(os.path.join(root, basin, year))):
+                if has_storm(basin, year, tc_id, root):
+                    storms.append((basin, int(year), tc_id))
+    return storms
+
+
+def load_meta(basin, year, tc_id, root=ARCHIVE_DIR):
+    with open(os.path.join(storm_dir(basin, year, tc_id, root), "meta.json")) as f:
+        return json.load(f)
+
+
+# Columns of one storm as a dict of (memory-mapped) arrays
+def load_storm_columns(basin, year, tc_id, root=ARCHIVE_DIR):
+    path = storm_dir(basin, year, tc_id, root)
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name, _ in COLUMNS.values()}
+
+
+# All archived fixes of the selected basins/years (or of the given list_storms
+# tuples) as one frame with the parse_trackfile columns plus Basin and Season
+def load_archive(basins=None, years=None, root=ARCHIVE_DIR, storms=None):
+    if storms is None:
+        storms = list_storms(basins, years, root)
+    parts = {name: [] for name, _ in COLUMNS.values()}
+    lengths, names = [], []
+    for basin, year, tc_id in storms:
+        names.append(load_meta(basin, year, tc_id, root)["name"])
+        columns = load_storm_columns(basin, year, tc_id, root)
+        for name in parts:
+            parts[name].append(columns[name])
+        lengths.append(len(columns["time"]))
+
+    def concat(name, dtype):
+        return np.concatenate(parts[name]) if parts[name] else np.array([], dtype=dtype)
+
+    lengths = np.array(lengths, dtype=int)
+    frame = pd.DataFrame({
+        "Id": np.repeat([tc_id.upper() for _, _, tc_id in storms], lengths),
+        "Name": np.repeat(names, lengths),
+        "Basin": np.repeat([basin for basin, _, _ in storms], lengths),
+        "Season": np.repeat(np.array([year for _, year, _ in storms], dtype="int16"), lengths),
+    })
+    for column, (name, dtype) in COLUMNS.items():
+        frame[column] = concat(name, dtype)
+    return frame
@@ -0,0 +1,77 @@
+from datetime import timedelta
+import argparse
+import sys
+
+from tc_archive import has_storm, save_storm
+from tc_fetch import make_session, fetch_concurrently, TIMEOUT
+from tc_pipeline import TRACKFILE_URL
+from tc_state import load_state, save_state, record_miss, miss_due
+from tc_trackfile import parse_trackfile
+
+# Backfill past seasons into the local archive, e.g.
+#   python tc_backfill.py al 2018 2024 --ids 1 30
+# Storms already archived are not fetched again unless --force is given.
+
+# State entry of the IDs NRL had no trackfile for: {tc_id: miss}. They are asked
+# again after BACKFILL_RETRY, doubling per further miss up to BACKFILL_MAX_RETRY
+# (or with --force); past seasons rarely gain storms.
+BACKFILL_KEY = "backfill"
+BACKFILL_RETRY = timedelta(days=1)
+BACKFILL_MAX_RETRY = timedelta(days=30)
+
+
+# Download and parse one storm, None when NRL has no such storm
+def fetch_archive_storm(session, basin, year, tc_id):
+    url = TRACKFILE_URL.format(year=year, basin=basin.upper(), tc_id=tc_id.upper())
+    response = session.get(url, timeout=TIMEOUT)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"Status code: {response.status_code} for {url}")
+    return parse_trackfile(response.content)
+
+
+def backfill(basin, first_year, last_year, first_id=1, last_id=30, force=False, session=None):
+    basin = basin.lower()
+    session = session or make_session()
+
+    candidates = [
+        (year, f"{basin}{number:02}{year}")
+        for year in range(first_year, last_year + 1)
+        for number in range(first_id, last_id + 1)
+    ]
+    missing = [(year, tc_id) for year, tc_id in candidates if force or not has_storm(basin, year, tc_id)]
+    state = load_state()
+    misses = state.setdefault(BACKFILL_KEY, {})
+    due = [(year, tc_id) for year, tc_id in missing
+           if force or miss_due(misses.get(tc_id), retry=BACKFILL_RETRY, max_retry=BACKFILL_MAX_RETRY)]
+    print(f"{len(candidates) - len(missing)} storms already archived, {len(missing) - len(due)} recently not found, fetching {len(due)}.")
+
+    failures = 0
+    results = fetch_concurrently(lambda item: fetch_archive_storm(session, basin, *item), due)
+    for (year, tc_id), df, error in results:
+        if error is not None:
+            print(f"Failed to fetch {tc_id}: {error}")
+            failures += 1
+        elif df is None:
+            misses[tc_id] = record_miss(misses.get(tc_id))
+        else:
+            misses.pop(tc_id, None)
+            if len(df):
+                save_storm(basin, year, tc_id, df)
+                print(f"Archived {tc_id} {df['Name'].iloc[-1]} ({len(df)} fixes)")
+    save_state(state)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill NRL best tracks into the local archive")
+    parser.add_argument("basin", help="basin code, e.g. al, wp, io, sh")
+    parser.add_argument("first_year", type=int, help="first season year")
+    parser.add_argument("last_year", type=int, nargs="?", help="last season year (default: first_year)")
+    parser.add_argument("--ids", type=int, nargs=2, default=[1, 30], metavar=("FIRST", "LAST"), help="storm number range (default: 1 30)")
+    parser.add_argument("--force", action="store_true", help="re-fetch storms that are already archived or were not found")
+    args = parser.parse_args()
+
+    last_year = args.last_year or args.first_year
+    sys.exit(1 if backfill(args.basin, args.first_year, last_year, *args.ids, force=args.force) else 0)
@@ -0,0 +1,148 @@
+import requests
+from PIL import Image
+import numpy as np
+import hashlib
+import json
+import os
+import io
+
+# Allow larger images
+Image.MAX_IMAGE_PIXELS = None
+
+BASEMAP_URL = "https://cdn.trackgen.codingcactus.codes/map.jpg"
+CACHE_DIR = os.environ.get("TC_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+INDEX_FILE = os.path.join(CACHE_DIR, "basemap.json")
+
+# Basemaps already loaded by this process, keyed by source URL
+_loaded = {}
+
+
+def _read_index():
+    try:
+        with open(INDEX_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(index):
+    tmp = INDEX_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, INDEX_FILE)
+
+
+# Ask the CDN for the current ETag without downloading the image
+def _current_etag(url):
+    try:
+        response = requests.head(url, timeout=15, allow_redirects=True)
+    except requests.exceptions.RequestException as e:
+        print(f"Basemap HEAD failed, using cached copy if any: {e}")
+        return None
+    if response.status_code != 200:
+        return None
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+
+# Download, decode and downscale the basemap, then store it as a .npy file
+def _download(url, etag):
+    img_response = requests.get(url, timeout=60)
+    if img_response.status_code != 200:
+        print(f"Failed to retrieve the image. Status code: {img_response.status_code}")
+        return None
+
+    etag = img_response.headers.get("ETag") or img_response.headers.get("Last-Modified") or etag or ""
+    img = Image.open(io.BytesIO(img_response.content)).convert("RGB")
+    img = img.resize((int(img.width / 2), int(img.height / 2)), Image.Resampling.LANCZOS)  # Downscale by 2x
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    key = hashlib.sha1(f"{url}\n{etag}".encode()).hexdigest()[:16]
+    path = os.path.join(CACHE_DIR, f"basemap_{key}.npy")
+    tmp = path + ".tmp.npy"
+    np.save(tmp, np.asarray(img))
+    os.replace(tmp, path)
+
+    # Drop the raster of the previous ETag
+    index = _read_index()
+    old = index.get(url)
+    if old and old["file"] != os.path.basename(path):
+        try:
+            os.remove(os.path.join(CACHE_DIR, old["file"]))
+        except OSError:
+            pass
+    index[url] = {"etag": etag, "file": os.path.basename(path)}
+    _write_index(index)
+    return path
+
+
+# Get the 2x-downscaled basemap as a read-only memory-mapped array.
+# The network is only hit for a HEAD request unless the ETag has changed.
+def load_basemap(url=BASEMAP_URL):
+    if url in _loaded:
+        return _loaded[url]
+
+    cached = _read_index().get(url)
+    etag = _current_etag(url)
+
+    path = None
+    if cached and os.path.exists(os.path.join(CACHE_DIR, cached["file"])):
+        if etag is None or etag == cached["etag"]:
+            path = os.path.join(CACHE_DIR, cached["file"])
+    if path is None:
+        try:
+            path = _download(url, etag)
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"Failed to retrieve the image: {e}")
+        # Fall back to a stale copy rather than no map at all
+        if path is None and cached and os.path.exists(os.path.join(CACHE_DIR, cached["file"])):
+            path = os.path.join(CACHE_DIR, cached["file"])
+
+    if path is None:
+        return np.zeros((1000, 1000, 3), dtype=np.uint8)  # Placeholder in case of error
+
+    _loaded[url] = np.load(path, mmap_mode="r")
+    return _loaded[url]
+
+
+# Slice the lon/lat window (plus a margin in degrees) out of a global
+# basemap covering [-180, 180] x [-90, 90]. Returns the crop and its extent.
+# Windows past ±180 (tracks and plumes crossing the dateline) wrap around the map.
+def crop_basemap(image, xlim, ylim, margin=1.0):
+    height, width = image.shape[:2]
+    lon_min, lon_max = sorted(xlim)
+    lat_min, lat_max = sorted(ylim)
+
+    col0 = int(np.floor((lon_min - margin + 180) / 360 * width))
+    col1 = max(int(np.ceil((lon_max + margin + 180) / 360 * width)), col0 + 1)
+    row0 = int(np.clip(np.floor((90 - lat_max - margin) / 180 * height), 0, height - 1))
+    row1 = int(np.clip(np.ceil((90 - lat_min + margin) / 180 * height), row0 + 1, height))
+
+    # Extent of the pixel edges actually kept, so the crop lines up with the world map
+    extent = [
+        -180 + col0 * 360 / width,
+        -180 + col1 * 360 / width,
+        90 - row1 * 180 / height,
+        90 - row0 * 180 / height,
+    ]
+    if col0 < 0 or col1 > width:
+        return np.take(image[row0:row1], np.arange(col0, col1), axis=1, mode="wrap"), extent
+    return image[row0:row1, col0:col1], extent
+
+
+# Draw only the part of the basemap the axes will show. Call it after the
+# axis limits and aspect are set; the aspect settings are kept as they were.
+def show_basemap(ax, image, margin=1.0, **kwargs):
+    aspect, adjustable = ax.get_aspect(), ax.get_adjustable()
+    # Register the whole world as data so 'datalim' aspect picks the same limits as the uncropped map
+    ax.update_datalim([(-180, -90), (180, 90)], updatex=True, updatey=True)
+    ax.apply_aspect()
+    crop, extent = crop_basemap(image, ax.get_xlim(), ax.get_ylim(), margin)
+    artist = ax.imshow(crop, extent=extent, aspect='auto', zorder=0, **kwargs)
+    ax.set_aspect(aspect, adjustable=adjustable)
+    return artist
+
+
+# Use an already cached raster (e.g. in a render worker) without asking the CDN again
+def preload_basemap(path, url=BASEMAP_URL):
+    _loaded[url] = np.load(path, mmap_mode="r")
+    return _loaded[url]
@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+import os
+
+from tc_analogues import haversine_km
+
+# Bundled gazetteer: name, country, latitude, longitude and the basins whose
+# storms are checked against the city (space separated basin codes)
+CITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tc_cities.csv")
+
+# Comma-separated city names to check instead of the basin's gazetteer cities,
+# e.g. TC_CITIES="Dhaka,Chattogram,Kolkata"
+CITY_LIST = os.environ.get("TC_CITIES")
+
+# Cities whose closest approach is farther than this are left out
+CITY_RADIUS_KM = 800
+
+# Cities named on the figure
+FIGURE_CITIES = 2
+
+KM_PER_DEG = 111.195
+
+# Gazetteers already read by this process, keyed by file, and the city
+# selections already made from them as plain arrays
+_loaded = {}
+_selected = {}
+
+
+def load_cities(path=CITIES_FILE):
+    if path not in _loaded:
+        cities = pd.read_csv(path, dtype={"basins": str})
+        cities["basins"] = cities["basins"].fillna("").str.lower().str.split()
+        _loaded[path] = cities
+    return _loaded[path]
+
+
+# Gazetteer cities checked for a basin: the names in `names` (default CITY_LIST)
+# when given, otherwise every city listed for the basin. Returns a dict of
+# name/country/latitude/longitude arrays, built once per selection.
+def select_cities(basin=None, names=None, path=CITIES_FILE):
+    names = names if names is not None else CITY_LIST
+    if isinstance(names, str):
+        names = names.split(",")
+    wanted = tuple(sorted({name.strip().lower() for name in names or () if name.strip()}))
+    key = (path, None if wanted else (basin or "").lower(), wanted)
+    if key not in _selected:
+        cities = load_cities(path)
+        if wanted:
+            cities = cities[cities["name"].str.lower().isin(wanted)]
+        elif basin:
+            cities = cities[cities["basins"].map(lambda basins: basin.lower() in basins)]
+        _selected[key] = {
+            "name": cities["name"].to_numpy(),
+            "country": cities["country"].to_numpy(),
+            "latitude": cities["latitude"].to_numpy(dtype="float64"),
+            "longitude": cities["longitude"].to_numpy(dtype="float64"),
+        }
+    return _selected[key]
+
+
+# Closest approach of a track to every city, looking along the segments between
+# fixes rather than at the fixes only. Each city/segment pair is solved at once
+# in a local flat projection around the city. The distance at the closest point
+# is then taken on the great circle. Returns the cities within radius_km, nearest
+# first, as dicts of name, country, distance_km, time (Timestamp) and current_km.
+def closest_approach(track_data, cities, radius_km=CITY_RADIUS_KM):
+    df = track_data if track_data["Synoptic Time"].is_monotonic_increasing else track_data.sort_values("Synoptic Time")
+    if not len(df) or not len(cities["name"]):
+        return []
+
+    lat = df["Latitude"].to_numpy(dtype="float64")
+    lon = df["Longitude"].to_numpy(dtype="float64")
+    time = df["Synoptic Time"].to_numpy(dtype="datetime64[s]").astype("int64")
+    if len(df) == 1:
+        lat, lon, time = np.repeat(lat, 2), np.repeat(lon, 2), np.repeat(time, 2)
+    city_lat = np.asarray(cities["latitude"], dtype="float64")
+    city_lon = np.asarray(cities["longitude"], dtype="float64")
+
+    # Fix positions in km east/north of each city (cities x fixes)
+    scale = np.cos(np.radians(city_lat))[:, None] * KM_PER_DEG
+    x = ((lon[None, :] - city_lon[:, None] + 180) % 360 - 180) * scale
+    y = (lat[None, :] - city_lat[:, None]) * KM_PER_DEG
+
+    # Point of each segment nearest the city, as a fraction along the segment
+    dx, dy = np.diff(x, axis=1), np.diff(y, axis=1)
+    length2 = dx ** 2 + dy ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.clip(np.where(length2 > 0, -(x[:, :-1] * dx + y[:, :-1] * dy) / length2, 0), 0, 1)
+    nearest = np.argmin((x[:, :-1] + fraction * dx) ** 2 + (y[:, :-1] + fraction * dy) ** 2, axis=1)
+    f = fraction[np.arange(len(city_lat)), nearest]
+
+    dlon = (lon[nearest + 1] - lon[nearest] + 180) % 360 - 180
+    point_lat = lat[nearest] + (lat[nearest + 1] - lat[nearest]) * f
+    point_lon = lon[nearest] + dlon * f
+    distance = haversine_km(city_lat, city_lon, point_lat, point_lon)
+    when = time[nearest] + np.round((time[nearest + 1] - time[nearest]) * f).astype("int64")
+    current = haversine_km(city_lat, city_lon, lat[-1], lon[-1])
+
+    order = np.argsort(distance, kind="stable")
+    return [
+        {
+            "name": cities["name"][i],
+            "country": cities["country"][i],
+            "distance_km": float(distance[i]),
+            "time": pd.Timestamp(int(when[i]), unit="s"),
+            "current_km": float(current[i]),
+        }
+        for i in order[distance[order] <= radius_km]
+    ]
+
+
+# JSON-ready closest approaches of the basin's cities; the time is None while
+# the storm is still nearing the city at its latest fix
+def city_summary(track_data, basin=None, names=None):
+    basin = basin or str(track_data["Id"].iloc[0])[:2]
+    last_time = track_data["Synoptic Time"].max()
+    return [
+        {
+            "name": city["name"],
+            "country": city["country"],
+            "closest_km": round(city["distance_km"]),
+            "closest_time": None if city["time"] >= last_time else city["time"].isoformat(),
+            "current_km": round(city["current_km"]),
+        }
+        for city in closest_approach(track_data, select_cities(basin, names))
+    ]
+
+
+# Figure line of the nearest cities, e.g. "CLOSEST: CHATTOGRAM 45KM 18Z 27-MAY | DHAKA 120KM NOW"
+def cities_text(cities, limit=FIGURE_CITIES):
+    parts = []
+    for city in cities[:limit]:
+        when = "NOW" if city["closest_time"] is None else pd.Timestamp(city["closest_time"]).strftime("%HZ %d-%b").upper()
+        parts.append(f"{city['name'].upper()} {city['closest_km']}KM {when}")
+    return f"CLOSEST: {' | '.join(parts)}" if parts else ""
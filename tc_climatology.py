@@ -0,0 +1,189 @@
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import io
+import os
+
+from tc_basemap import CACHE_DIR, load_basemap, show_basemap
+from tc_archive import list_storms, load_meta, load_archive
+from tc_season import is_invest, NAMED_WIND, MAJOR_WIND
+
+# Per-basin track climatology: fix counts on a lat/lon grid per calendar month.
+#   density - every fix of every storm (invests excluded)
+#   genesis - the first fix of storms that became named storms
+#   major   - fixes at major-hurricane strength
+# Each season's counts are kept as sparse (flat index, count) arrays in
+# .cache/climatology/<basin>.npz, so new fixes only recompute their own season.
+CLIMATOLOGY_DIR = os.path.join(CACHE_DIR, "climatology")
+
+CELL_DEG = 1.0
+KINDS = ("density", "genesis", "major")
+MONTH_EDGES = np.arange(0.5, 13)
+LAT_EDGES = np.arange(-90, 90 + CELL_DEG, CELL_DEG)
+LON_EDGES = np.arange(-180, 180 + CELL_DEG, CELL_DEG)
+GRID_SHAPE = (12, len(LAT_EDGES) - 1, len(LON_EDGES) - 1)
+
+
+# Month x lat x lon counts of the given fixes in one histogramdd call
+def _histogram(month, lat, lon):
+    counts, _ = np.histogramdd(np.column_stack([month, lat, lon]), bins=(MONTH_EDGES, LAT_EDGES, LON_EDGES))
+    return counts.astype(np.uint32)
+
+
+# Sparse (flat index, count) pairs of a dense grid
+def _sparse(grid):
+    index = np.flatnonzero(grid).astype(np.int32)
+    return index, grid.ravel()[index]
+
+
+# Sparse grids of every kind for the fixes of one season (load_archive frame)
+def season_grids(fixes):
+    fixes = fixes[~fixes["Id"].map(is_invest)] if len(fixes) else fixes
+    fixes = fixes.drop_duplicates(["Id", "Synoptic Time"], keep="last").sort_values(["Id", "Synoptic Time"])
+    month = fixes["Synoptic Time"].dt.month.to_numpy()
+    lat = fixes["Latitude"].to_numpy(dtype="float64")
+    lon = (fixes["Longitude"].to_numpy(dtype="float64") + 180) % 360 - 180
+    wind = fixes["Intensity"].to_numpy()
+
+    ids = fixes["Id"].to_numpy()
+    first = np.append(True, ids[1:] != ids[:-1]) if len(ids) else np.zeros(0, dtype=bool)
+    named = fixes.groupby("Id", sort=False)["Intensity"].transform("max").to_numpy() >= NAMED_WIND
+
+    masks = {
+        "density": np.ones(len(fixes), dtype=bool),
+        "genesis": first & named,
+        "major": wind >= MAJOR_WIND,
+    }
+    return {kind: _sparse(_histogram(month[mask], lat[mask], lon[mask])) for kind, mask in masks.items()}
+
+
+def _paths(basin):
+    return os.path.join(CLIMATOLOGY_DIR, f"{basin}.npz"), os.path.join(CLIMATOLOGY_DIR, f"{basin}.json")
+
+
+# Cached sparse season grids of a basin: ({season: {kind: (index, count)}}, {season: {storm: version}})
+def load_basin(basin):
+    grids_path, versions_path = _paths(basin)
+    try:
+        with open(versions_path) as f:
+            versions = json.load(f)
+        with np.load(grids_path) as data:
+            grids = {
+                season: {kind: (data[f"{season}_{kind}_index"], data[f"{season}_{kind}_count"]) for kind in KINDS}
+                for season in versions
+            }
+        return grids, versions
+    except (OSError, ValueError, KeyError):
+        return {}, {}
+
+
+def save_basin(basin, grids, versions):
+    os.makedirs(CLIMATOLOGY_DIR, exist_ok=True)
+    grids_path, versions_path = _paths(basin)
+    arrays = {}
+    for season, kinds in grids.items():
+        for kind, (index, count) in kinds.items():
+            arrays[f"{season}_{kind}_index"] = index
+            arrays[f"{season}_{kind}_count"] = count
+    np.savez_compressed(grids_path + ".tmp.npz", **arrays)
+    os.replace(grids_path + ".tmp.npz", grids_path)
+    with open(versions_path + ".tmp", "w") as f:
+        json.dump(versions, f, sort_keys=True)
+    os.replace(versions_path + ".tmp", versions_path)
+
+
+# Bring the cached grids of the given basins (default: all archived) up to date:
+# only seasons with a new, changed or removed storm are re-read and re-binned.
+def update_climatology(basins=None):
+    archived = {}
+    for basin, year, tc_id in list_storms(basins):
+        meta = load_meta(basin, year, tc_id)
+        archived.setdefault(basin, {}).setdefault(str(year), {})[tc_id] = f"{meta['fixes']}|{meta['last_fix']}"
+
+    for basin in basins or sorted(archived):
+        grids, versions = load_basin(basin)
+        seasons = archived.get(basin, {})
+        stale = sorted(season for season in set(seasons) | set(versions) if seasons.get(season) != versions.get(season))
+        if not stale:
+            continue
+
+        print(f"Updating {basin.upper()} climatology for seasons {', '.join(stale)}.")
+        for season in stale:
+            if season not in seasons:
+                grids.pop(season, None)
+                versions.pop(season, None)
+                continue
+            fixes = load_archive(storms=[(basin, int(season), tc_id) for tc_id in seasons[season]])
+            grids[season] = season_grids(fixes)
+            versions[season] = seasons[season]
+        save_basin(basin, grids, versions)
+
+
+# Summed counts of one kind for a basin, (12, lat, lon) or (lat, lon) when
+# months are given, optionally limited to some seasons
+def climatology(basin, kind="density", months=None, seasons=None):
+    grids, _ = load_basin(basin)
+    parts = [grids[season][kind] for season in grids if seasons is None or int(season) in seasons]
+    if parts:
+        index = np.concatenate([index for index, _ in parts])
+        count = np.concatenate([count for _, count in parts])
+        total = np.bincount(index, weights=count, minlength=np.prod(GRID_SHAPE)).reshape(GRID_SHAPE)
+    else:
+        total = np.zeros(GRID_SHAPE)
+    if months is not None:
+        total = total[[month - 1 for month in months]].sum(axis=0)
+    return total
+
+
+# Heatmap of a (lat, lon) count grid over the basemap, zoomed to the cells with
+# data. Returns PNG bytes.
+def climatology_map(grid, title, margin=5.0):
+    fig, ax = plt.subplots(figsize=(12, 8), dpi=150)
+    rows, cols = np.nonzero(grid)
+    if len(rows):
+        ax.set_xlim(LON_EDGES[cols.min()] - margin, LON_EDGES[cols.max() + 1] + margin)
+        ax.set_ylim(max(LAT_EDGES[rows.min()] - margin, -90), min(LAT_EDGES[rows.max() + 1] + margin, 90))
+    else:
+        ax.set_xlim(-180, 180)
+        ax.set_ylim(-60, 60)
+    ax.set_aspect('equal', adjustable='datalim')
+    show_basemap(ax, load_basemap())
+
+    masked = np.ma.masked_equal(grid, 0)
+    mesh = ax.pcolormesh(LON_EDGES, LAT_EDGES, masked, cmap="YlOrRd", alpha=0.75, zorder=1,
+                         norm=LogNorm(vmin=1, vmax=max(masked.max() if masked.count() else 1, 2)))
+    fig.colorbar(mesh, ax=ax, shrink=0.7, label="FIXES PER 1° CELL")
+    ax.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.5)
+    ax.set_title(title, fontsize=18, fontweight='bold', color='red')
+    ax.text(0.99, 0.01, "© XP WEATHER", fontsize=12, ha="right", va="bottom", color='white', transform=ax.transAxes,
+            bbox=dict(facecolor='white', alpha=0.4, edgecolor='none'))
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track density, genesis and major-hurricane climatology of the archive")
+    parser.add_argument("basins", nargs="*", help="basins to update (default: all archived)")
+    parser.add_argument("--render", metavar="DIR", help="write <basin>_<kind>[_<month>].png maps to DIR")
+    parser.add_argument("--monthly", action="store_true", help="with --render, also one map per month")
+    args = parser.parse_args()
+
+    update_climatology(args.basins or None)
+    if args.render:
+        os.makedirs(args.render, exist_ok=True)
+        for basin in args.basins or sorted(name[:-4] for name in os.listdir(CLIMATOLOGY_DIR) if name.endswith(".npz")):
+            for kind in KINDS:
+                monthly = climatology(basin, kind)
+                maps = {"": monthly.sum(axis=0)}
+                if args.monthly:
+                    maps.update({f"_{month:02}": monthly[month - 1] for month in range(1, 13)})
+                for suffix, grid in maps.items():
+                    label = pd.Timestamp(2000, int(suffix[1:]), 1).strftime(" %B").upper() if suffix else ""
+                    with open(os.path.join(args.render, f"{basin}_{kind}{suffix}.png"), "wb") as f:
+                        f.write(climatology_map(grid, f"{basin.upper()} {kind.upper()}{label} CLIMATOLOGY"))
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+import threading
+import argparse
+import signal
+import sys
+
+from tc_pipeline import run, BASIN_ORDER, OVERVIEW_KEY, SECTOR_KEY
+from tc_state import load_state
+from tc_fetch import make_session
+from tc_publish import FtpPublisher
+from tc_timing import summary_table
+
+# Long-running mode of tc_all.py: one process keeps the imports, the basemap and
+# figure caches and the HTTP/FTP sessions warm, and polls the sector file with
+# conditional requests instead of running blind on a cron schedule.
+# Run: python tc_daemon.py [basins] [--animate] [--max-hours 5.75]
+
+# NRL publishes the best-track fix of a synoptic time (00/06/12/18Z) some time
+# after it; the poll interval is shortest in this window after every synoptic hour
+SYNOPTIC_HOURS = 6
+SYNOPTIC_WINDOW = (timedelta(minutes=30), timedelta(hours=4))
+
+# Seconds between polls
+POLL_ACTIVE_WINDOW = 90     # storms active, inside the synoptic window
+POLL_ACTIVE = 300           # storms active, outside the window
+POLL_QUIET_WINDOW = 600     # no storms, inside the window (new invests)
+POLL_QUIET = 1800           # no storms
+POLL_AFTER_FAILURE = 120    # retry a failed run soon, whatever the activity
+POLL_MAX_BACKOFF = 1800
+
+
+# Time since the last synoptic hour
+def since_synoptic(now):
+    start = now.replace(hour=now.hour - now.hour % SYNOPTIC_HOURS, minute=0, second=0, microsecond=0)
+    return now - start
+
+
+# Seconds to wait before the next poll, given the number of active storms and
+# the number of consecutive failed runs (doubling the retry delay each time)
+def poll_interval(now, active, failed_runs=0):
+    if failed_runs:
+        return min(POLL_AFTER_FAILURE * 2 ** (failed_runs - 1), POLL_MAX_BACKOFF)
+    in_window = SYNOPTIC_WINDOW[0] <= since_synoptic(now) <= SYNOPTIC_WINDOW[1]
+    if active:
+        return POLL_ACTIVE_WINDOW if in_window else POLL_ACTIVE
+    return POLL_QUIET_WINDOW if in_window else POLL_QUIET
+
+
+# Active storms and sector-file version recorded by the last run
+def _last_run():
+    state = load_state()
+    return len(state.get(OVERVIEW_KEY, {}).get("storms", [])), state.get(SECTOR_KEY, {}).get("sha256")
+
+
+# Poll until stopped (SIGINT/SIGTERM) or for max_hours; returns the number of
+# failed storms of the last run, so a recovered daemon exits cleanly. No poll
+# starts after max_hours. The stage timings of all polls are summarized once at exit.
+def serve(basins=None, workers=None, animate=False, max_hours=None):
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    deadline = datetime.now(timezone.utc) + timedelta(hours=max_hours) if max_hours else None
+
+    session = make_session()
+    publisher = FtpPublisher()
+    failed_runs = failures = 0
+    records = []
+    try:
+        while not stop.is_set():
+            if deadline is not None and datetime.now(timezone.utc) >= deadline:
+                break
+            _, version = _last_run()
+            try:
+                failures = run(basins, session=session, workers=workers, animate=animate, publisher=publisher, records=records)
+            except Exception as e:
+                print(f"Run failed: {e}")
+                failures = 1
+            failed_runs = failed_runs + 1 if failures else 0
+
+            now = datetime.now(timezone.utc)
+            active, new_version = _last_run()
+            wait = poll_interval(now, active, failed_runs)
+            if deadline is not None:
+                wait = min(wait, max((deadline - now).total_seconds(), 0))
+            change = "sector file updated" if new_version != version else "no change"
+            last = deadline is not None and now + timedelta(seconds=wait) >= deadline
+            print(f"[{now:%Y-%m-%d %H:%MZ}] {change}, {active} active storm(s), {'stopping' if last else 'next poll'} in {wait:.0f}s.")
+            stop.wait(wait)
+    finally:
+        publisher.close()
+        session.close()
+        print(summary_table(records))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll NRL and publish tropical cyclone tracks as soon as they update")
+    parser.add_argument("basins", nargs="*", default=BASIN_ORDER, help="basins to process (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count, 1 renders in-process)")
+    parser.add_argument("--animate", action="store_true", help="also publish an MP4/GIF loop of every rendered track")
+    parser.add_argument("--max-hours", type=float, default=None, help="exit after this many hours (e.g. below a CI job limit)")
+    args = parser.parse_args()
+
+    sys.exit(1 if serve(args.basins, workers=args.workers, animate=args.animate, max_hours=args.max_hours) else 0)
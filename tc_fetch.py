@@ -0,0 +1,43 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+# (connect, read) timeout in seconds for every NRL request
+TIMEOUT = (10, 60)
+
+# Number of trackfiles downloaded at the same time
+MAX_WORKERS = 8
+
+
+# One pooled session keeps the TLS connection to nrlmry.navy.mil open between requests
+def make_session(pool_size=MAX_WORKERS, retries=3):
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = False  # NRL's certificate chain is not verifiable on the runners
+    return session
+
+
+# Run fn over items on a thread pool. Returns (item, result, error) in input order,
+# so a failing download never hides the others.
+def fetch_concurrently(fn, items, workers=MAX_WORKERS):
+    def call(item):
+        try:
+            return item, fn(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(call, items))
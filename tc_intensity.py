@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+import json
+
+from tc_analogues import haversine_km
+from tc_land import land_rasters, classify, find_landfalls
+from tc_cities import city_summary
+
+# Look-back windows (hours) for the intensity and pressure tendencies
+TENDENCY_HOURS = (6, 12, 24, 48)
+
+# Rapid intensification / weakening: 24-hour wind change of at least 30 kt
+RI_KT_24H = 30
+RW_KT_24H = -30
+
+KM_PER_NM = 1.852
+
+# At sea closer than this to the coast, the figure gives the distance
+COAST_NEAR_KM = 300
+
+COMPASS = np.array(["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"])
+
+
+# Initial great-circle bearing in degrees (0 = north), vectorized like haversine_km
+def bearing_deg(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype="float64")) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+
+def compass_point(heading):
+    return COMPASS[int(np.round(heading / 22.5)) % 16]
+
+
+# Change of `values` over the previous `hours` at every fix. The value `hours`
+# earlier is interpolated in time, so irregular or missing fixes are handled;
+# fixes without that much history get NaN.
+def _tendency(hours_since_start, values, hours):
+    past = hours_since_start - hours
+    previous = np.interp(past, hours_since_start, values)
+    return np.where(past >= hours_since_start[0], values - previous, np.nan)
+
+
+# Per-fix analytics of a parse_trackfile frame: wind/pressure tendencies over
+# TENDENCY_HOURS, rapid intensification/weakening flags and the translation
+# speed (kt) and heading since the previous fix. Returns a copy with the extra columns.
+def track_analytics(track_data):
+    df = track_data.reset_index(drop=True).copy()
+    # Repeated synoptic times (corrected fixes) would break the time interpolation
+    df = df.drop_duplicates("Synoptic Time", keep="last").reset_index(drop=True)
+
+    time = df["Synoptic Time"].to_numpy(dtype="datetime64[s]").astype("int64")
+    hours = (time - time[0]) / 3600.0
+    wind = df["Intensity"].to_numpy(dtype="float64")
+    pressure = df["Pressure"].to_numpy(dtype="float64")
+    for h in TENDENCY_HOURS:
+        df[f"dV{h}"] = _tendency(hours, wind, h)
+        df[f"dP{h}"] = _tendency(hours, pressure, h)
+    df["RI"] = df["dV24"] >= RI_KT_24H
+    df["RW"] = df["dV24"] <= RW_KT_24H
+
+    lat = df["Latitude"].to_numpy(dtype="float64")
+    lon = df["Longitude"].to_numpy(dtype="float64")
+    step_km = haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    step_hours = np.diff(hours)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(step_hours > 0, step_km / KM_PER_NM / step_hours, np.nan)
+    df["Speed"] = np.concatenate([[np.nan], speed])
+    df["Heading"] = np.concatenate([[np.nan], bearing_deg(lat[:-1], lon[:-1], lat[1:], lon[1:])])
+    return df
+
+
+# Periods (start, end) of consecutive flagged fixes
+def _episodes(times, flags):
+    flags = np.asarray(flags, dtype=bool)
+    edges = np.diff(np.concatenate([[False], flags, [False]]).astype(int))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return [(pd.Timestamp(times[a]).isoformat(), pd.Timestamp(times[b]).isoformat()) for a, b in zip(starts, stops)]
+
+
+def _number(value):
+    return None if pd.isna(value) else round(float(value), 1)
+
+
+# Position over land/sea, distance to the coast and landfalls of a track, or
+# None when no land mask is available (basemap not cached)
+def _land_summary(df):
+    rasters = land_rasters()
+    if rasters is None:
+        return None
+    over_land, coast_km = classify(df["Latitude"].iloc[-1:], df["Longitude"].iloc[-1:], rasters)
+    landfalls = find_landfalls(df, rasters)
+    return {
+        "over_land": bool(over_land[0]),
+        "distance_to_coast_km": _number(coast_km[0]),
+        "landfalls": [
+            {"time": row["Synoptic Time"].isoformat(), "latitude": _number(row["Latitude"]),
+             "longitude": _number(row["Longitude"]), "wind_kt": int(row["Intensity"])}
+            for _, row in landfalls.iterrows()
+        ],
+    }
+
+
+# Latest state, tendencies, motion, RI/RW history, landfalls and nearby cities
+# of a storm as plain JSON values
+def storm_summary(track_data, cyclone_id=None, basin=None):
+    df = track_analytics(track_data)
+    last = df.iloc[-1]
+    peak = df.loc[df["Intensity"].idxmax()]
+    times = df["Synoptic Time"].to_numpy()
+    return {
+        "id": str(cyclone_id or last["Id"]).upper(),
+        "name": str(last["Name"]),
+        "basin": basin.upper() if basin else None,
+        "time": last["Synoptic Time"].isoformat(),
+        "latitude": _number(last["Latitude"]),
+        "longitude": _number(last["Longitude"]),
+        "wind_kt": int(last["Intensity"]),
+        "pressure_mb": int(last["Pressure"]),
+        "peak": {"time": peak["Synoptic Time"].isoformat(), "wind_kt": int(peak["Intensity"]), "pressure_mb": int(peak["Pressure"])},
+        "wind_change_kt": {f"{h}h": _number(last[f"dV{h}"]) for h in TENDENCY_HOURS},
+        "pressure_change_mb": {f"{h}h": _number(last[f"dP{h}"]) for h in TENDENCY_HOURS},
+        "motion": {
+            "speed_kt": _number(last["Speed"]),
+            "heading_deg": _number(last["Heading"]),
+            "direction": None if pd.isna(last["Heading"]) else str(compass_point(last["Heading"])),
+        },
+        "rapid_intensification": bool(last["RI"]),
+        "rapid_weakening": bool(last["RW"]),
+        "max_24h_intensification_kt": _number(df["dV24"].max()),
+        "ri_periods": _episodes(times, df["RI"]),
+        "rw_periods": _episodes(times, df["RW"]),
+        "land": _land_summary(df),
+        "cities": city_summary(df, basin),
+    }
+
+
+# Sidecar file uploaded next to the track images
+def summary_json(summary):
+    return json.dumps(summary, indent=1).encode()
+
+
+def _latlon(lat, lon):
+    return f"{abs(lat):.1f}{'S' if lat < 0 else 'N'} {abs(lon):.1f}{'W' if lon < 0 else 'E'}"
+
+
+# One-line annotation for the track figure, e.g.
+# "24H: +35KT / -28MB | MOTION: NW 12KT | RAPID INTENSIFICATION | LANDFALL: 18Z 28-AUG 25.1N 80.3W"
+def summary_text(summary):
+    parts = []
+    dv, dp = summary["wind_change_kt"]["24h"], summary["pressure_change_mb"]["24h"]
+    if dv is not None:
+        parts.append(f"24H: {dv:+.0f}KT / {dp:+.0f}MB")
+    motion = summary["motion"]
+    if motion["speed_kt"] is not None:
+        if motion["speed_kt"] < 1:
+            parts.append("MOTION: STATIONARY")
+        else:
+            parts.append(f"MOTION: {motion['direction']} {motion['speed_kt']:.0f}KT")
+    if summary["rapid_intensification"]:
+        parts.append("RAPID INTENSIFICATION")
+    elif summary["rapid_weakening"]:
+        parts.append("RAPID WEAKENING")
+    land = summary.get("land")
+    if land:
+        if land["landfalls"]:
+            last = land["landfalls"][-1]
+            time = pd.Timestamp(last["time"]).strftime("%HZ %d-%b").upper()
+            parts.append(f"LANDFALL: {time} {_latlon(last['latitude'], last['longitude'])}")
+        if land["over_land"]:
+            parts.append("OVER LAND")
+        elif land["distance_to_coast_km"] is not None and land["distance_to_coast_km"] < COAST_NEAR_KM:
+            parts.append(f"COAST: {land['distance_to_coast_km']:.0f}KM")
+    return " | ".join(parts)
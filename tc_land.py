@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+import glob
+import os
+
+from tc_basemap import load_basemap
+
+# Land/sea rasters derived from the cached basemap, stored next to it in the cache:
+#   landmask_<key>.npy  - bit-packed land mask on the basemap's own pixel grid
+#   coastdist_<key>.npy - signed distance to the coast (km, >0 at sea, <0 inland)
+#                         on a COAST_CELL_DEG grid
+# Both are built once per basemap version and memory-mapped afterwards.
+
+# Basemap pixels whose blue channel exceeds red by this much (and is at least the
+# green) are water: deep and shallow ocean are blue/cyan, land is green, brown or white.
+WATER_BLUE_MARGIN = 15
+
+COAST_CELL_DEG = 0.1
+COAST_MAX_KM = 500          # distances are capped here
+KM_PER_DEG = 111.195
+
+# Points sampled along each 6-hourly segment when looking for a landfall
+LANDFALL_SAMPLES = 32
+
+# Rasters of the basemaps already opened by this process, keyed by basemap file
+_loaded = {}
+
+
+# Land mask (bool, rows from 90N, columns from 180W) of an RGB basemap, built in row blocks
+def land_mask(image, block=512):
+    mask = np.empty(image.shape[:2], dtype=bool)
+    for row in range(0, image.shape[0], block):
+        rgb = np.asarray(image[row:row + block], dtype=np.int16)
+        red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        mask[row:row + block] = ~((blue >= red + WATER_BLUE_MARGIN) & (blue >= green))
+    return mask
+
+
+# Distance (km) of every cell to the nearest True cell of `feature`, a global
+# lat/lon grid of `cell_deg` cells, capped at max_km. Exact along each latitude
+# row (wrapping at the dateline), then combined across rows within max_km.
+def _distance_km(feature, cell_deg, max_km=COAST_MAX_KM):
+    height, width = feature.shape
+    column = np.arange(width)
+    big = 4 * width
+
+    # Cells to the nearest feature on the same row, looking west and east with wrap-around
+    west = np.maximum.accumulate(np.where(feature, column, -big), axis=1)
+    west = np.where(west < 0, west[:, -1:] - width, west)
+    east = np.minimum.accumulate(np.where(feature, column, big)[:, ::-1], axis=1)[:, ::-1]
+    east = np.where(east >= big, east[:, :1] + width, east)
+    cells = np.minimum(column - west, east - column).astype(np.float32)
+
+    lat = 90 - (np.arange(height) + 0.5) * cell_deg
+    row_km = (np.cos(np.radians(lat)) * cell_deg * KM_PER_DEG).astype(np.float32)
+    row_squared = (cells * row_km[:, None]) ** 2
+    row_squared[cells > width] = np.inf
+
+    # Nearest over the rows within max_km north and south of each cell
+    squared = np.minimum(row_squared, np.float32(max_km) ** 2)
+    step_km = cell_deg * KM_PER_DEG
+    for offset in range(1, int(max_km / step_km) + 1):
+        dy2 = np.float32((offset * step_km) ** 2)
+        np.minimum(squared[offset:], row_squared[:-offset] + dy2, out=squared[offset:])
+        np.minimum(squared[:-offset], row_squared[offset:] + dy2, out=squared[:-offset])
+    return np.sqrt(squared)
+
+
+# Signed distance to the coast (km) on a cell_deg grid, sampled from the full-resolution mask
+def coast_distance(mask, cell_deg=COAST_CELL_DEG, max_km=COAST_MAX_KM):
+    height, width = mask.shape
+    rows = ((np.arange(int(round(180 / cell_deg))) + 0.5) * cell_deg / 180 * height).astype(int)
+    cols = ((np.arange(int(round(360 / cell_deg))) + 0.5) * cell_deg / 360 * width).astype(int)
+    land = mask[rows][:, cols]
+    distance = _distance_km(land, cell_deg, max_km) - _distance_km(~land, cell_deg, max_km)
+    return np.round(distance).astype(np.int16)
+
+
+# Build (or reuse) the rasters of a cached basemap; returns (packed mask, mask width, distance)
+def _open_rasters(basemap_path, image):
+    folder, name = os.path.split(basemap_path)
+    key = name[len("basemap_"):] if name.startswith("basemap_") else name
+    mask_path = os.path.join(folder, f"landmask_{key}")
+    distance_path = os.path.join(folder, f"coastdist_{key}")
+
+    if not (os.path.exists(mask_path) and os.path.exists(distance_path)):
+        print("Building the land mask and distance-to-coast rasters from the basemap...")
+        mask = land_mask(image)
+        for path, data in ((distance_path, coast_distance(mask)), (mask_path, np.packbits(mask, axis=1))):
+            tmp = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp, data)
+            os.replace(tmp, path)
+        # Drop the rasters of earlier basemap versions
+        for path in glob.glob(os.path.join(folder, "landmask_*.npy")) + glob.glob(os.path.join(folder, "coastdist_*.npy")):
+            if path not in (mask_path, distance_path) and not path.endswith(".tmp.npy"):
+                os.remove(path)
+
+    return np.load(mask_path, mmap_mode="r"), image.shape[1], np.load(distance_path, mmap_mode="r")
+
+
+# Land rasters of the current basemap, or None while only the placeholder map is available
+def land_rasters(image=None):
+    image = load_basemap() if image is None else image
+    path = getattr(image, "filename", None)
+    if path is None:
+        return None
+    if path not in _loaded:
+        _loaded[path] = _open_rasters(path, image)
+    return _loaded[path]
+
+
+def _pixel(lat, lon, height, width):
+    row = np.clip(((90 - lat) / 180 * height).astype(int), 0, height - 1)
+    col = np.clip((((lon + 180) % 360) / 360 * width).astype(int), 0, width - 1)
+    return row, col
+
+
+# Over-land flag and signed distance to the coast (km) of every position
+def classify(lats, lons, rasters):
+    packed, width, distance = rasters
+    lat = np.asarray(lats, dtype="float64")
+    lon = np.asarray(lons, dtype="float64")
+    row, col = _pixel(lat, lon, packed.shape[0], width)
+    over_land = (packed[row, col >> 3] >> (7 - (col & 7))) & 1 == 1
+    row, col = _pixel(lat, lon, *distance.shape)
+    return over_land, distance[row, col].astype("float64")
+
+
+# Landfalls of a track: the first land point along every segment that starts at
+# sea, sampled LANDFALL_SAMPLES times between the fixes so islands crossed between
+# two fixes count too. Returns a frame of Synoptic Time, Latitude, Longitude, Intensity.
+def find_landfalls(track_data, rasters):
+    df = track_data.sort_values("Synoptic Time")
+    lat = df["Latitude"].to_numpy(dtype="float64")
+    lon = df["Longitude"].to_numpy(dtype="float64")
+    wind = df["Intensity"].to_numpy(dtype="float64")
+    time = df["Synoptic Time"].to_numpy(dtype="datetime64[s]").astype("int64")
+    columns = ["Synoptic Time", "Latitude", "Longitude", "Intensity"]
+    if len(df) < 2:
+        return pd.DataFrame(columns=columns)
+
+    at_sea = ~classify(lat, lon, rasters)[0][:-1]
+    start = np.flatnonzero(at_sea)
+    fraction = np.arange(1, LANDFALL_SAMPLES + 1) / LANDFALL_SAMPLES
+    dlon = (lon[start + 1] - lon[start] + 180) % 360 - 180
+    sample_lat = lat[start, None] + (lat[start + 1] - lat[start])[:, None] * fraction
+    sample_lon = lon[start, None] + dlon[:, None] * fraction
+    on_land = classify(sample_lat.ravel(), sample_lon.ravel(), rasters)[0].reshape(sample_lat.shape)
+
+    hit = on_land.any(axis=1)
+    segment, first = start[hit], on_land[hit].argmax(axis=1)
+    f = fraction[first]
+    return pd.DataFrame({
+        "Synoptic Time": pd.to_datetime(np.round(time[segment] + (time[segment + 1] - time[segment]) * f), unit="s"),
+        "Latitude": sample_lat[hit, first],
+        "Longitude": (sample_lon[hit, first] + 180) % 360 - 180,
+        "Intensity": np.round(wind[segment] + (wind[segment + 1] - wind[segment]) * f),
+    }, columns=columns)
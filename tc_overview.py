@@ -0,0 +1,77 @@
+from matplotlib.transforms import Bbox
+from datetime import datetime, timezone
+import numpy as np
+
+from tc_plot import figure_template, draw_track, encode_variants
+from tc_archive import has_storm, load_archive
+from tc_timing import stage
+
+# World/tropics view of the overview map. The figure is wide so the equal-aspect
+# axes show the tropics of every basin at once.
+OVERVIEW_XLIM = (-180, 180)
+OVERVIEW_YLIM = (-50, 50)
+OVERVIEW_FIGSIZE = (16, 6)
+
+# Upload name of the overview images, e.g. active_storms_web.jpg
+OVERVIEW_NAME = "active_storms"
+
+
+# Archived tracks of the active storms: (tc_id, basin, season) tuples as in the
+# pipeline. Storms missing from the archive are left out.
+def active_tracks(storms):
+    archived = [(basin, int(year), tc_id.lower()) for tc_id, basin, year in storms if has_storm(basin, year, tc_id)]
+    return load_archive(storms=archived)
+
+
+# Rasterize every track of a load_archive frame on one tropics figure, labelled
+# with each storm's name and current wind. Returns an RGB array.
+def rasterize_overview(fixes, updated=None):
+    template = figure_template(OVERVIEW_XLIM, OVERVIEW_YLIM, figsize=OVERVIEW_FIGSIZE)
+    ax, canvas = template.ax, template.fig.canvas
+    renderer = canvas.get_renderer()
+    canvas.restore_region(template.background)
+
+    artists, labels, current = [], [], []
+    for tc_id, track in fixes.groupby("Id", sort=False):
+        track = track.sort_values("Synoptic Time")
+        artists += draw_track(ax, track["Longitude"], track["Latitude"], track["Intensity"], marker_size=4, last_marker_size=8)
+        last = track.iloc[-1]
+        name = last["Name"] if "INVEST" not in last["Name"] else tc_id
+        current.append((int(last["Intensity"]), name, tc_id))
+        labels.append(ax.text(last["Longitude"] + 1.5, last["Latitude"] + 1.5, f"{name}\n{int(last['Intensity'])}KT",
+                              fontsize=7, fontweight='bold', color='white', clip_on=True,
+                              bbox=dict(facecolor='black', alpha=0.4, edgecolor='none', pad=1.5)))
+
+    current.sort(reverse=True)
+    update_time = (updated or datetime.now(timezone.utc)).strftime("%HZ UTC %d-%b-%Y").upper()
+    texts = {
+        "title": "ACTIVE TROPICAL CYCLONES",
+        "peak": f"UPDATED\n{update_time}",
+        "maxima": f"ACTIVE SYSTEMS: {len(current)}\n" + (f"STRONGEST: {current[0][1]} {current[0][0]}KT" if current else "NO ACTIVE STORMS"),
+        "info": " | ".join(f"{name} {wind}KT" for wind, name, _ in current) or "NO ACTIVE STORMS",
+        "xlabel": "SOURCE: NRL BEST TRACKS",
+    }
+    try:
+        for key, artist in template.texts.items():
+            artist.set_text(texts[key])
+            artist.set_visible(True)
+        for artist in artists + labels + list(template.texts.values()):
+            ax.draw_artist(artist)
+        bbox = Bbox.union([template.static_bbox] + [artist.get_window_extent(renderer) for artist in template.texts.values()])
+        return template._crop(np.asarray(renderer.buffer_rgba()), bbox)
+    finally:
+        for artist in artists + labels:
+            artist.remove()
+        for artist in template.texts.values():
+            artist.set_visible(False)
+
+
+# Render the overview of the given active storms, returns {file suffix: encoded bytes}
+def render_overview(storms, updated=None):
+    fixes = active_tracks(storms)
+    with stage("overview_draw"):
+        image = rasterize_overview(fixes, updated)
+    with stage("overview_encode") as timing:
+        variants = encode_variants(image)
+        timing["bytes"] = sum(len(data) for data in variants.values())
+    return variants
@@ -0,0 +1,296 @@
+from datetime import datetime
+import matplotlib
+matplotlib.use("Agg")
+
+from tc_plot import render_many, upload_name, render_cyclone_track
+from tc_animate import render_with_loop
+from tc_trackfile import parse_trackfile
+from tc_archive import save_storm, storm_season
+from tc_analogues import storm_analogues
+from tc_intensity import storm_summary, summary_json
+from tc_season import update_stats, season_json, season_chart
+from tc_climatology import update_climatology
+from tc_adeck import fetch_guidance, miss_state, ADECK_URL
+from tc_publish import FtpPublisher
+from tc_fetch import make_session, fetch_concurrently, TIMEOUT
+from tc_state import load_state, save_state, conditional_headers, is_unchanged, has_fix, record, prune, storm_ids
+from tc_sector import parse_sector_file
+from tc_timing import stage, take_records, write_jsonl, summary_table
+from tc_overview import render_overview, OVERVIEW_NAME
+
+SECTOR_FILE_URL = "https://www.nrlmry.navy.mil/tcdat/sectors/updated_sector_file"
+TRACKFILE_URL = "https://www.nrlmry.navy.mil/tcdat/tc{year}/{basin}/{tc_id}/txt/trackfile.txt"
+
+# Basins handled by the 3-hourly run, in the order the tc_*.py scripts used to run
+BASIN_ORDER = ["io", "wp", "al", "ep", "cp", "sh"]
+
+# State entry of the last published overview map
+OVERVIEW_KEY = "overview"
+
+# State entry of the sector file behind the last complete run
+SECTOR_KEY = "sector"
+
+
+# Get the year of a basin's NRL trackfile directory (tcYYYY), the SH season rolls
+# over in October. Archive and upload directories use the storm's own season.
+def season_year(basin, now=None):
+    now = now or datetime.now()
+    if basin == "sh" and now.month in (10, 11, 12):
+        return str(now.year + 1)
+    return str(now.year)
+
+
+# Fetch and parse one storm's trackfile (conditional on the last published one).
+# Returns the response and the parsed frame, or None when nothing changed.
+def fetch_storm(session, tc_id, basin, year, entry):
+    url2 = TRACKFILE_URL.format(year=year, basin=basin.upper(), tc_id=tc_id.upper())
+    with stage("trackfile_fetch", tc_id) as timing:
+        response2 = session.get(url2, headers=conditional_headers(entry), timeout=TIMEOUT)
+        timing["bytes"] = len(response2.content)
+        timing["status"] = response2.status_code
+
+    if response2.status_code not in (200, 304):
+        raise RuntimeError(f"Status code: {response2.status_code} for {url2}")
+    if is_unchanged(entry, response2):
+        return response2, None
+
+    print(f"Data fetched from {url2}.")
+    with stage("parse", tc_id):
+        return response2, parse_trackfile(response2.content)
+
+
+# Keep the season archive current for analytics and re-renders. The season comes
+# from the storm's ID, not the clock, so a storm still active in January stays
+# in the season tc_backfill.py stores it under.
+def archive_storm(basin, tc_id, df):
+    with stage("archive", tc_id):
+        save_storm(basin, storm_season(tc_id), tc_id, df)
+
+
+# Upload one file of a storm (or of the season) to the season's directory,
+# the basin's subdirectory when a basin is given
+def publish(publisher, year, basin, name, data, storm=None):
+    directory = f'htdocs/tc/{year}/{basin.upper()}' if basin else f'htdocs/tc/{year}'
+    with stage("upload", storm, file=name) as timing:
+        publisher.upload(directory, name, data)
+        timing["bytes"] = len(data)
+
+
+# Fetch the sector file once, download every active storm of the given basins
+# concurrently and render the ones whose trackfile or forecast guidance changed
+# (all of them with force) on a pool of `workers` processes, plus a track loop
+# each with animate.
+# The sector file is requested conditionally: when it has not changed since the
+# last run without failures, only the a-decks of the published storms are checked.
+# Returns the number of storms that failed.
+# A session and publisher passed in are reused and left open (see tc_daemon).
+# Every stage is timed; the records are appended to TIMING_FILE and summarized
+# at the end of the run, or added to `records` for the caller to summarize.
+def run(basins=None, force=False, session=None, workers=None, animate=False, publisher=None, records=None):
+    try:
+        with stage("run"):
+            return _run(basins, force, session, workers, animate, publisher)
+    finally:
+        taken = take_records()
+        write_jsonl(taken)
+        if records is None:
+            print(summary_table(taken))
+        else:
+            records.extend(taken)
+
+
+def _run(basins, force, session, workers, animate, publisher):
+    basins = [basin.lower() for basin in (basins or BASIN_ORDER)]
+    session = session or make_session()
+    state = load_state()
+    sector_entry = {} if force else state.get(SECTOR_KEY, {})
+
+    # Fetch data with SSL verification disabled
+    with stage("sector_fetch") as timing:
+        response = session.get(SECTOR_FILE_URL, headers=conditional_headers(sector_entry), timeout=TIMEOUT)
+        timing["bytes"] = len(response.content)
+        timing["status"] = response.status_code
+    if response.status_code not in (200, 304):
+        print("Failed to fetch data.")
+        return 1
+    if is_unchanged(sector_entry, response):
+        if not ADECK_URL:
+            print("Sector file unchanged since the last run, nothing to do.\n")
+            return 0
+        # No new fixes, but model guidance often arrives hours after the fix
+        print("Sector file unchanged since the last run, checking forecast guidance only.\n")
+        sector = None
+        jobs = [(tc_id.upper(), tc_id[:2], season_year(tc_id[:2])) for tc_id in storm_ids(state, basins)]
+    else:
+        print("Data fetched successfully.\n")
+        sector = parse_sector_file(response.content)
+        jobs = [(record.tc_id, basin, season_year(basin)) for basin in basins for record in sector.basin(basin)]
+    entries = {tc_id: ({} if force else state.get(tc_id.lower(), {})) for tc_id, _, _ in jobs}
+
+    # Storms whose newest sector-file fix (time, name, wind and pressure) is already
+    # published need no trackfile request
+    failures = 0
+    changed = []
+    fetch_jobs = []
+    for tc_id, basin, year in jobs:
+        if sector is None:
+            continue
+        if has_fix(entries[tc_id], sector.get(tc_id)):
+            print(f"Processing TC ID: {tc_id}")
+            print(f"No new fix for {tc_id} since {entries[tc_id].get('last_fix')}, skipping.\n")
+        else:
+            fetch_jobs.append((tc_id, basin, year))
+
+    # Download and parse all changed trackfiles at once
+    results = fetch_concurrently(lambda job: fetch_storm(session, *job, entries[job[0]]), fetch_jobs)
+
+    for (tc_id, basin, year), result, error in results:
+        print(f"Processing TC ID: {tc_id}")
+        if error is not None:
+            print(f"Failed to fetch data for {tc_id}: {error}")
+            failures += 1
+            continue
+
+        response2, df = result
+        if df is None:
+            print(f"No new fix for {tc_id} since {entries[tc_id].get('last_fix')}, skipping.\n")
+            continue
+
+        # Output cyclone information
+        cyclone_name, cyclone_id = df['Name'].iloc[0], df['Id'].iloc[0]
+        print(f"Cyclone Name: {cyclone_name} ({cyclone_id})")
+        changed.append((tc_id, basin, year, response2, df))
+        archive_storm(basin, tc_id, df)
+
+    # Latest model guidance of every active storm from its ATCF a-deck, drawn as a plume.
+    # Storms with a new trackfile get the whole a-deck; the others ask for it
+    # conditionally and are re-rendered when their latest guidance changed.
+    # Storms whose a-deck is missing (404) are only asked again after a back-off.
+    forecasts, adecks = {}, {}
+    changed_frames = {tc_id: df for tc_id, _, _, _, df in changed}
+    guidance_jobs = []
+    for tc_id, basin, year in jobs if ADECK_URL else []:
+        if tc_id in changed_frames:
+            guidance_jobs.append((tc_id, basin, year, changed_frames[tc_id]['Synoptic Time'].max(),
+                                  miss_state(entries[tc_id].get("adeck"))))
+        elif entries[tc_id].get("last_fix"):
+            guidance_jobs.append((tc_id, basin, year, entries[tc_id]["last_fix"], entries[tc_id].get("adeck")))
+    guidance = fetch_concurrently(lambda job: fetch_guidance(session, job[0], *job[3:]), guidance_jobs)
+    refresh = []
+    for (tc_id, basin, year, _, _), result, error in guidance:
+        if error is not None:
+            print(f"No forecast guidance for {tc_id}: {error}")
+            continue
+        if result is None:
+            continue
+        adecks[tc_id], forecast = result
+        if forecast is None:
+            # Unchanged or missing guidance: only remember the a-deck version (or its 404) for the next request
+            if tc_id not in changed_frames and tc_id.lower() in state:
+                state[tc_id.lower()]["adeck"] = adecks[tc_id]
+            continue
+        if len(forecast):
+            forecasts[tc_id] = forecast
+        if tc_id not in changed_frames:
+            refresh.append((tc_id, basin, year))
+
+    # Storms with new guidance only: their published trackfile is fetched again to
+    # redraw them (and archived if it changed after all)
+    results = fetch_concurrently(lambda job: fetch_storm(session, *job, {}), refresh)
+    for (tc_id, basin, year), result, error in results:
+        print(f"New forecast guidance for {tc_id}.")
+        if error is not None:
+            print(f"Failed to fetch data for {tc_id}: {error}")
+            failures += 1
+            continue
+        response2, df = result
+        changed.append((tc_id, basin, year, response2, df))
+        if not is_unchanged(entries[tc_id], response2):
+            changed_frames[tc_id] = df
+            archive_storm(basin, tc_id, df)
+
+    own_publisher = publisher is None
+    publisher = publisher or FtpPublisher()
+    try:
+        # Render every changed storm, uploading each image as soon as it is ready
+        rendered = render_many([(df, df['Id'].iloc[0], basin, 1.5, forecasts.get(tc_id), tc_id) for tc_id, basin, _, _, df in changed], workers,
+                               render=render_with_loop if animate else render_cyclone_track)
+        for (tc_id, basin, _, response2, df), (variants, error) in zip(changed, rendered):
+            # One broken storm must not stop the other basins
+            try:
+                if error is not None:
+                    raise error
+                cyclone_name, cyclone_id = df['Name'].iloc[0], df['Id'].iloc[0]
+                season = str(storm_season(tc_id))
+                for suffix, data in variants.items():
+                    publish(publisher, season, basin, upload_name(cyclone_name, cyclone_id, suffix), data, tc_id)
+
+                # Intensity/pressure tendencies, motion and RI flags next to the images
+                with stage("analytics", tc_id):
+                    summary = storm_summary(df, cyclone_id, basin)
+                publish(publisher, season, basin, upload_name(cyclone_name, cyclone_id, ".json"), summary_json(summary), tc_id)
+                if summary["rapid_intensification"] or summary["rapid_weakening"]:
+                    change = "intensifying" if summary["rapid_intensification"] else "weakening"
+                    print(f"{cyclone_id} is rapidly {change}: {summary['wind_change_kt']['24h']:+.0f}KT in 24H")
+
+                # Only remember the trackfile once its image is published
+                record(state, tc_id, response2, df['Synoptic Time'].iloc[-1].isoformat(),
+                       sector.get(tc_id) if sector is not None else None, adecks.get(tc_id))
+
+                with stage("analogues", tc_id):
+                    analogues = storm_analogues(df, basin, tc_id)
+                if analogues is not None and len(analogues):
+                    print(f"Historical analogues of {cyclone_id}:\n{analogues.to_string(index=False)}\n")
+            except Exception as e:
+                print(f"Error processing {tc_id}: {e}")
+                failures += 1
+
+        # Season ACE and storm counts of every basin that got new fixes
+        seasons = sorted({(basin, storm_season(tc_id)) for tc_id, basin, _, _, _ in changed if tc_id in changed_frames})
+        if seasons:
+            try:
+                with stage("season_stats"):
+                    stats = update_stats([basin for basin, _ in seasons], [season for _, season in seasons])
+                for basin, season in seasons:
+                    with stage("season_chart"):
+                        chart = season_chart(stats, basin, season)
+                    publish(publisher, str(season), basin, "season_summary.json", season_json(stats, basin, season))
+                    publish(publisher, str(season), basin, "season_summary.png", chart)
+            except Exception as e:
+                print(f"Error updating season statistics: {e}")
+                failures += 1
+
+            # Fold the new fixes into the cached track climatology grids
+            try:
+                with stage("climatology"):
+                    update_climatology(sorted({basin for basin, _ in seasons}))
+            except Exception as e:
+                print(f"Error updating climatology: {e}")
+                failures += 1
+
+        # The rest only follows a new sector file (the overview map shows no guidance)
+        if sector is None:
+            return failures
+
+        # One map of every active storm of all basins, redrawn when a track or the set of storms changed
+        active = [(record.tc_id, record.basin, storm_season(record.tc_id)) for record in sector if record.basin in BASIN_ORDER]
+        active_ids = sorted(tc_id.lower() for tc_id, _, _ in active)
+        if changed or force or state.get(OVERVIEW_KEY, {}).get("storms") != active_ids:
+            try:
+                year = str(datetime.now().year)
+                for suffix, data in render_overview(active, sector.updated).items():
+                    publish(publisher, year, None, f"{OVERVIEW_NAME}{suffix}", data)
+                state[OVERVIEW_KEY] = {"storms": active_ids}
+            except Exception as e:
+                print(f"Error rendering the overview map: {e}")
+                failures += 1
+        prune(state, basins, [tc_id for tc_id, _, _ in jobs])
+
+        # Only a complete run of every basin may skip an unchanged sector file next time
+        if not failures and set(basins) >= set(BASIN_ORDER):
+            record(state, SECTOR_KEY, response, sector.updated.isoformat() if sector.updated else None)
+    finally:
+        if own_publisher:
+            publisher.close()
+        save_state(state)
+    return failures
@@ -0,0 +1,501 @@
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
+from matplotlib.transforms import Bbox
+from collections import OrderedDict
+from PIL import Image, features
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+import io
+
+from tc_basemap import load_basemap, show_basemap, preload_basemap
+from tc_intensity import storm_summary, summary_text
+from tc_land import land_rasters
+from tc_cities import cities_text
+from tc_adeck import consensus_track, OFFICIAL_TECHNIQUES
+from tc_timing import stage, take_records, add_records
+
+# Define the conditions and corresponding colors for cyclone categories
+prev_conditions = [
+    ("Invest Area", 'lime'),
+    ("Depression", 'steelblue'),
+    ("Deep Depression", 'deepskyblue'),
+    ("Cyclonic Storm", 'aqua'),
+    ("Category 1", 'lemonchiffon'),
+    ("Category 2", 'gold'),
+    ("Category 3", 'tomato'),
+    ("Category 4", 'fuchsia'),
+    ("Category 5", 'mediumpurple'),
+]
+
+# Intensity (kt) a fix has to exceed to move past each category of prev_conditions
+CATEGORY_THRESHOLDS = np.array([22, 27, 33, 63, 83, 96, 113, 136])
+CATEGORY_COLORS = np.array([color for _, color in prev_conditions])
+
+
+# Map intensities to the marker colors of prev_conditions in one lookup
+def category_colors(intensity):
+    return CATEGORY_COLORS[np.searchsorted(CATEGORY_THRESHOLDS, np.asarray(intensity), side='left')]
+
+
+# Draw the whole track as one LineCollection plus one category-colored scatter
+def draw_track(ax, lons, lats, intensity, marker_size=9, last_marker_size=12):
+    points = np.column_stack([lons, lats])
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    # No line across the whole map where a track jumps the dateline (179E -> 179W)
+    segments = segments[np.abs(np.diff(points[:, 0])) <= 180]
+    lines = ax.add_collection(LineCollection(segments, colors='white', linewidths=0.6, linestyles='-', zorder=1))
+
+    # Scatter sizes are in points squared, Line2D marker sizes in points
+    sizes = np.full(len(points), float(marker_size) ** 2)
+    sizes[-1] = float(last_marker_size) ** 2
+    markers = ax.scatter(points[:, 0], points[:, 1], s=sizes, c=category_colors(intensity), edgecolors='k', linewidths=1.0, zorder=2)
+    return lines, markers
+
+
+# Forecast longitudes next to a reference longitude (the last best-track fix),
+# so plumes crossing the dateline stay continuous
+def unwrap_longitudes(lons, reference):
+    return reference + (np.asarray(lons, dtype="float64") - reference + 180) % 360 - 180
+
+
+# Draw the model plume (one thin line per technique), the official forecasts and
+# the consensus track of a latest_guidance frame below the best track
+def draw_forecast(ax, guidance, reference_lon):
+    artists = []
+    lons = unwrap_longitudes(guidance["Longitude"], reference_lon)
+    models, official = [], []
+    for technique, rows in guidance.groupby("Technique", sort=False).indices.items():
+        line = np.column_stack([lons[rows], guidance["Latitude"].to_numpy()[rows]])
+        if len(line) > 1:
+            (official if technique in OFFICIAL_TECHNIQUES else models).append(line)
+    if models:
+        artists.append(ax.add_collection(LineCollection(models, colors='0.85', linewidths=0.8, alpha=0.7, zorder=1)))
+    if official:
+        artists.append(ax.add_collection(LineCollection(official, colors='red', linewidths=1.6, linestyles='--', zorder=1)))
+
+    consensus = consensus_track(guidance)
+    if len(consensus) > 1:
+        artists += ax.plot(unwrap_longitudes(consensus["Longitude"], reference_lon), consensus["Latitude"], color='black',
+                           linewidth=2.2, marker='o', markersize=4, markerfacecolor='white', zorder=1)
+    return artists
+
+
+# Define storm category based on cyclone_id
+def storm_type_for(cyclone_id):
+    if 'L' in cyclone_id or 'E' in cyclone_id:
+        return "Hurricane"
+    elif 'A' in cyclone_id or 'B' in cyclone_id or 'S' in cyclone_id:
+        return "Cyclone"
+    elif 'W' in cyclone_id:
+        return "Typhoon"
+    return "Storm"  # Default if none of the conditions are met
+
+
+# Name of an uploaded image on the website
+def upload_name(cyclone_name, cyclone_id, suffix=".jpg"):
+    return f"{cyclone_name.lower()} ({cyclone_id}){suffix}"
+
+
+# Figure size and resolution of every track image
+FIGSIZE = (12, 10)
+DPI = 300
+
+# Number of static figure templates kept per process and figure size/resolution
+# (each holds a full-size raster)
+TEMPLATE_CACHE_SIZE = 3
+
+# Viewport bounds are widened to multiples of this many degrees, so later fixes of
+# a storm usually fall in the same box and reuse its figure template
+VIEWPORT_SNAP_DEG = 5.0
+
+
+# Widen a viewport outwards to the VIEWPORT_SNAP_DEG grid. The axes keep their
+# equal aspect, so the figure shows the same map for every track in the snapped box.
+def snap_viewport(xlim, ylim, step=VIEWPORT_SNAP_DEG):
+    if not step:
+        return xlim, ylim
+    xlim = (np.floor(xlim[0] / step) * step, np.ceil(xlim[1] / step) * step)
+    ylim = (max(np.floor(ylim[0] / step) * step, -90.0), min(np.ceil(ylim[1] / step) * step, 90.0))
+    return xlim, ylim
+
+
+# Lat/lon box of the figure: the bounding box of the track (and of the forecast
+# guidance, if any) zoomed out around its center, snapped to the VIEWPORT_SNAP_DEG grid
+def track_viewport(track_data, zoom_out_factor=1.5, forecast=None, snap=VIEWPORT_SNAP_DEG):
+    lats, lons = track_data["Latitude"], track_data["Longitude"]
+    if forecast is not None and len(forecast):
+        lats = np.concatenate([lats, forecast["Latitude"]])
+        lons = np.concatenate([lons, unwrap_longitudes(forecast["Longitude"], track_data["Longitude"].iloc[-1])])
+
+    # Get cyclone's lat/lon boundaries
+    lat_min = lats.min()
+    lat_max = lats.max()
+    lon_min = lons.min()
+    lon_max = lons.max()
+
+    # Calculate the center of the cyclone region
+    lat_center = (lat_max + lat_min) / 2
+    lon_center = (lon_max + lon_min) / 2
+
+    # Apply zoom-out factor to the latitude and longitude ranges
+    lat_range = (lat_max - lat_min) * zoom_out_factor
+    lon_range = (lon_max - lon_min) * zoom_out_factor
+
+    # Calculate new min/max boundaries after zooming out
+    xlim = (lon_center - lon_range / 2, lon_center + lon_range / 2)
+    ylim = (lat_center - lat_range / 2, lat_center + lat_range / 2)
+    return snap_viewport(xlim, ylim, snap)
+
+
+# Peak time and maxima texts above the map
+def peak_texts(max_wind, max_wind_time, max_mslp):
+    maxtime = max_wind_time.strftime("%HZ %d-%b")
+    return {
+        "peak": f"PEAK TIME\n{maxtime.upper()}",
+        "maxima": f"MAX WIND: {max_wind}KT\nMIN MSLP: {max_mslp}MB",
+    }
+
+
+# Title, peak time, maxima, wind/pressure box and xlabel of a track figure
+def track_texts(track_data, cyclone_id, basin, forecast=None):
+    cyclone_name = track_data['Name'].iloc[0]
+
+    # Calculate max wind speed and time of occurrence
+    max_wind = track_data['Intensity'].max()
+    max_wind_time = track_data.loc[track_data['Intensity'].idxmax(), 'Synoptic Time']
+    max_mslp = track_data.loc[track_data['Intensity'].idxmax(), 'Pressure']
+
+    observed_start_time = track_data['Synoptic Time'].iloc[0].strftime("%HZ %d-%b-%Y")
+    observed_end_time = track_data['Synoptic Time'].iloc[-1].strftime("%HZ %d-%b-%Y")
+    update_time = track_data['Synoptic Time'].iloc[-1].strftime("%HZ UTC %d-%b-%Y")
+    wind = track_data['Intensity'].iloc[-1]
+    mslp = track_data['Pressure'].iloc[-1]
+    info_text = f"WIND SPEED: {wind}KT | PRESSURE: {mslp} | {update_time.upper()}"
+
+    # Tendencies, motion and RI/RW flag on a line above the current conditions,
+    # the closest approach to nearby cities above that
+    summary = storm_summary(track_data, cyclone_id, basin)
+    for line in (summary_text(summary), cities_text(summary["cities"])):
+        if line:
+            info_text = f"{line}\n{info_text}"
+    if forecast is not None and len(forecast):
+        init = forecast["Init"].max().strftime("%HZ %d-%b").upper()
+        models = forecast.loc[~forecast["Technique"].isin(OFFICIAL_TECHNIQUES), "Technique"].nunique()
+        info_text = f"GUIDANCE {init}: {models} MODELS (GRAY) | OFFICIAL (RED) | CONSENSUS (BLACK)\n{info_text}"
+
+    # Check if 'Invest' is in the cyclone_name
+    if 'INVEST' in cyclone_name:
+        title_text = f'{basin.upper()} INVEST "{cyclone_id.upper()}" TRACK'
+    else:
+        title_text = f'{storm_type_for(cyclone_id).upper()} "{cyclone_name.upper()}" TRACK'
+
+    return {
+        "title": title_text,
+        **peak_texts(max_wind, max_wind_time, max_mslp),
+        "info": info_text,
+        "xlabel": f"START: {observed_start_time.upper()} | END: {observed_end_time.upper()}",
+    }
+
+
+# The static layers of a track figure for one viewport and basemap: the basemap
+# crop, grid, ticks and frame are rasterized once below the track, the legend and
+# copyright box once as a transparent overlay above it. Each storm then only
+# draws its track and texts onto a copy of the cached raster.
+class TrackFigureTemplate:
+    def __init__(self, xlim, ylim, background_image, dpi=DPI, figsize=FIGSIZE):
+        self.fig, self.ax = plt.subplots(figsize=figsize, dpi=dpi)
+        ax = self.ax
+
+        # Set axis limits for the cyclone region, equal aspect and the basemap crop
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        ax.set_aspect('equal', adjustable='datalim')
+        show_basemap(ax, background_image)
+
+        # Add grid lines with opacity 0.5
+        ax.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.5)
+
+        # Text artists filled in per storm; the static draw positions them
+        box = dict(facecolor='white', alpha=0.4, edgecolor='none')
+        self.texts = {
+            "title": ax.set_title(" ", fontsize=20, fontweight='bold', color='red', x=0.5, y=1.015, fontdict={'horizontalalignment': 'center'}),
+            "peak": ax.text(1.00, 1.01, " ", fontsize=14, ha="right", va="bottom", color='.1', transform=ax.transAxes),
+            "maxima": ax.text(0.00, 1.01, " ", fontsize=14, ha="left", va="bottom", color='.1', transform=ax.transAxes),
+            "info": ax.text(0.01, 0.01, " ", fontsize=14, ha="left", va="bottom", color='white', transform=ax.transAxes, bbox=box),
+            "xlabel": ax.set_xlabel(" ", fontsize='14', fontweight='bold'),
+        }
+
+        # Create the legend for previous conditions and the copyright box
+        legend_elements_prev = [
+            Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=8, label=condition, lw=0, mec='k')
+            for condition, color in prev_conditions
+        ]
+        legend = ax.legend(handles=legend_elements_prev, title='COLOR LEGENDS', loc='upper right')
+        legend.get_title().set_fontweight('bold')
+        cc = ax.text(0.99, 0.01, "© XP WEATHER", fontsize=14, ha="right", va="bottom", color='white', transform=ax.transAxes, bbox=box)
+        overlay_artists = [legend, cc]
+
+        # Layer below the track
+        for artist in list(self.texts.values()) + overlay_artists:
+            artist.set_visible(False)
+        canvas = self.fig.canvas
+        canvas.draw()
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        renderer = canvas.get_renderer()
+        self.static_bbox = self.fig.get_tightbbox(renderer).transformed(self.fig.dpi_scale_trans)
+
+        # Layer above the track, kept as the small RGBA patch that is not transparent
+        renderer.clear()
+        for artist in overlay_artists:
+            artist.set_visible(True)
+            artist.draw(renderer)
+        overlay = np.asarray(renderer.buffer_rgba())
+        rows = np.flatnonzero(overlay[..., 3].any(axis=1))
+        cols = np.flatnonzero(overlay[..., 3].any(axis=0))
+        self.overlay_origin = (rows[0], cols[0])
+        overlay = overlay[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        alpha = overlay[..., 3:4].astype(np.float32) / 255
+        self.overlay_color = overlay[..., :3] * alpha + 0.5
+        self.overlay_keep = 1 - alpha
+
+    def close(self):
+        plt.close(self.fig)
+
+    # Rasterize one storm: returns the RGB array of the figure cropped like
+    # savefig(bbox_inches='tight')
+    def rasterize(self, track_data, texts, last_marker_size=12, forecast=None):
+        canvas = self.fig.canvas
+        renderer = canvas.get_renderer()
+        canvas.restore_region(self.background)
+
+        # Dynamic layer: forecast plume, track, then the texts
+        track_artists = []
+        if forecast is not None and len(forecast):
+            track_artists += draw_forecast(self.ax, forecast, track_data["Longitude"].iloc[-1])
+        track_artists += draw_track(self.ax, track_data["Longitude"], track_data["Latitude"], track_data["Intensity"], last_marker_size=last_marker_size)
+        for key, artist in self.texts.items():
+            artist.set_text(texts[key])
+            artist.set_visible(True)
+        for artist in list(track_artists) + list(self.texts.values()):
+            self.ax.draw_artist(artist)
+
+        bbox = Bbox.union([self.static_bbox] + [artist.get_window_extent(renderer) for artist in self.texts.values()])
+        image = self._crop(np.asarray(renderer.buffer_rgba()), bbox)
+
+        for artist in track_artists:
+            artist.remove()
+        for artist in self.texts.values():
+            artist.set_visible(False)
+        return image
+
+    # Cut the tight bounding box (plus savefig's 0.1 inch pad) out of the canvas
+    # and composite the overlay on top
+    def _crop(self, buffer, bbox):
+        height, width = buffer.shape[:2]
+        pad = 0.1 * self.fig.dpi
+        x0 = max(int(np.floor(bbox.x0 - pad)), 0)
+        x1 = min(int(np.ceil(bbox.x1 + pad)), width)
+        top = max(int(np.floor(height - bbox.y1 - pad)), 0)
+        bottom = min(int(np.ceil(height - bbox.y0 + pad)), height)
+        image = buffer[top:bottom, x0:x1, :3].copy()
+
+        row, col = self.overlay_origin[0] - top, self.overlay_origin[1] - x0
+        patch = image[row:row + self.overlay_keep.shape[0], col:col + self.overlay_keep.shape[1]]
+        patch[:] = (self.overlay_color + patch * self.overlay_keep).astype(np.uint8)
+        return image
+
+
+# Templates of this process: one LRU of TEMPLATE_CACHE_SIZE per (dpi, figsize),
+# so track loops and overview maps do not push the track figures out
+_templates = {}
+
+
+# Template for a viewport, rebuilt only when the viewport or basemap changes.
+# With a stage record as `timing`, notes whether the template was cached
+# (timing["template"] = "hit" or "miss").
+def figure_template(xlim, ylim, background_image=None, dpi=DPI, figsize=FIGSIZE, timing=None):
+    if background_image is None:
+        background_image = load_basemap()
+    cache = _templates.setdefault((dpi, tuple(figsize)), OrderedDict())
+    key = (tuple(np.round(xlim, 6)), tuple(np.round(ylim, 6)), id(background_image))
+    if timing is not None:
+        timing["template"] = "hit" if key in cache else "miss"
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    template = TrackFigureTemplate(xlim, ylim, background_image, dpi, figsize)
+    cache[key] = template
+    while len(cache) > TEMPLATE_CACHE_SIZE:
+        cache.popitem(last=False)[1].close()
+    return template
+
+
+# Rasterize the Cyclone Track (and the forecast guidance, a tc_adeck.latest_guidance frame) into an RGB array
+def rasterize_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor=1.5, forecast=None, timing=None):
+    xlim, ylim = track_viewport(track_data, zoom_out_factor, forecast)
+    template = figure_template(xlim, ylim, timing=timing)
+    return template.rasterize(track_data, track_texts(track_data, cyclone_id, basin, forecast), forecast=forecast)
+
+
+# Encoded variants of every track image: (file suffix, PIL format, max width, quality).
+# The full-size image keeps the old "<name> (<id>).jpg" name, now as a real JPEG.
+OUTPUT_VARIANTS = [
+    (".jpg", "JPEG", None, int(os.environ.get("TC_JPEG_QUALITY", 90))),
+    ("_web.jpg", "JPEG", 1600, int(os.environ.get("TC_WEB_QUALITY", 82))),
+    ("_web.webp", "WEBP", 1600, int(os.environ.get("TC_WEBP_QUALITY", 80))),
+    ("_thumb.jpg", "JPEG", 400, int(os.environ.get("TC_THUMB_QUALITY", 75))),
+]
+
+
+# Encode one rasterized image into every variant: returns {suffix: bytes}
+def encode_variants(image, variants=None):
+    full = Image.fromarray(image)
+    resized = {}
+    encoded = {}
+    for suffix, image_format, max_width, quality in variants or OUTPUT_VARIANTS:
+        if image_format == "WEBP" and not features.check("webp"):
+            continue
+        img = full
+        if max_width and full.width > max_width:
+            # Resize each width once, starting from the smallest larger copy already made
+            if max_width not in resized:
+                source = min((im for width, im in resized.items() if width > max_width), key=lambda im: im.width, default=full)
+                resized[max_width] = source.resize((max_width, round(full.height * max_width / full.width)), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            img = resized[max_width]
+
+        # Encode in memory, nothing is written to disk
+        buffer = io.BytesIO()
+        img.save(buffer, format=image_format, quality=quality, optimize=image_format == "JPEG", dpi=(DPI, DPI))
+        encoded[suffix] = buffer.getvalue()
+    return encoded
+
+
+# Function to render the Cyclone Track once, returns {file suffix: encoded bytes}.
+# The stages are timed under `storm`, the pipeline's storm ID (cyclone_id is the
+# trackfile's short ID shown in the title).
+def render_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor=1.5, forecast=None, storm=None):
+    with stage("draw", storm or cyclone_id) as timing:
+        image = rasterize_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor, forecast, timing)
+    with stage("encode", storm or cyclone_id) as timing:
+        variants = encode_variants(image)
+        timing["bytes"] = sum(len(data) for data in variants.values())
+    return variants
+
+
+# Render worker setup: Agg backend and the basemap mapped from the disk cache once
+def _init_render_worker(basemap_path):
+    matplotlib.use("Agg")
+    if basemap_path:
+        preload_basemap(basemap_path)
+
+
+def _render_in_process(job, render=render_cyclone_track):
+    try:
+        return render(*job), None
+    except Exception as e:
+        return None, e
+
+
+# Run one job in a worker and send its stage timings back with the result
+def _render_in_worker(render, *job):
+    take_records()
+    try:
+        return render(*job), take_records()
+    except Exception as e:
+        # Keep the timings of the failed job too
+        e.timings = take_records()
+        raise
+
+
+# Render processes kept between render_many calls (e.g. the polls of tc_daemon),
+# so their figure templates survive. Each is a one-process pool, so a storm can be
+# sent back to the worker holding its template.
+_pool = {"config": None, "workers": [], "owners": OrderedDict()}
+
+
+def _close_pool():
+    for worker in _pool["workers"]:
+        worker.shutdown(wait=False, cancel_futures=True)
+    _pool.update(config=None, workers=[], owners=OrderedDict())
+
+
+# The render workers for `workers` processes and the given basemap file, started
+# on first use and replaced when either changes
+def _render_pool(workers, basemap_path):
+    if _pool["config"] != (workers, basemap_path):
+        _close_pool()
+        _pool["workers"] = [ProcessPoolExecutor(max_workers=1, initializer=_init_render_worker, initargs=(basemap_path,))
+                            for _ in range(workers)]
+        _pool["config"] = (workers, basemap_path)
+    return _pool["workers"]
+
+
+# Worker for every job: the one that last drew the job's viewport, otherwise
+# the one with the fewest jobs. Jobs are render_cyclone_track arguments.
+def _assign_workers(jobs, workers):
+    owners = _pool["owners"]
+    load = [0] * workers
+    assigned = []
+    for job in jobs:
+        key = track_viewport(job[0], *job[3:5])
+        worker = owners.get(key)
+        if worker is None or load[worker] > min(load) + 1:
+            worker = load.index(min(load))
+        owners[key] = worker
+        owners.move_to_end(key)
+        load[worker] += 1
+        assigned.append(worker)
+    while len(owners) > workers * TEMPLATE_CACHE_SIZE:
+        owners.popitem(last=False)
+    return assigned
+
+
+# Render (track_data, cyclone_id, basin, zoom_out_factor, forecast, storm) jobs on
+# the render processes with `render`
+# (a module-level function returning {file suffix: bytes}).
+# Yields (variants, error) per job in job order, so uploads can start while
+# later storms are still rendering. workers=1 renders in this process.
+def render_many(jobs, workers=None, render=render_cyclone_track):
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    if not jobs:
+        return
+
+    # Make sure the basemap and its land rasters are cached on disk so every worker can map the same files
+    with stage("basemap"):
+        basemap = load_basemap()
+        basemap_path = getattr(basemap, "filename", None)
+        land_rasters(basemap)
+    if workers <= 1:
+        for job in jobs:
+            yield _render_in_process(job, render)
+        return
+
+    pool = _render_pool(workers, basemap_path)
+    futures = [pool[worker].submit(_render_in_worker, render, *job) for job, worker in zip(jobs, _assign_workers(jobs, workers))]
+    broken = False
+    for future in futures:
+        try:
+            variants, timings = future.result()
+            add_records(timings)
+            yield variants, None
+        except Exception as e:
+            broken = broken or isinstance(e, BrokenProcessPool)
+            add_records(getattr(e, "timings", []))
+            yield None, e
+    # A crashed worker cannot take new jobs; start all of them afresh next time
+    if broken:
+        _close_pool()
+
+
+# Function to plot the Cyclone Track and upload it through the run's FtpPublisher
+def plot_cyclone_track(track_data, cyclone_id, basin, year, publisher, zoom_out_factor=1.5, forecast=None):
+    variants = render_cyclone_track(track_data, cyclone_id, basin, zoom_out_factor, forecast)
+    cyclone_name = track_data['Name'].iloc[0]
+    for suffix, data in variants.items():
+        publisher.upload(f'htdocs/tc/{year}/{basin.upper()}', upload_name(cyclone_name, cyclone_id, suffix), data)
@@ -0,0 +1,73 @@
+import ftplib
+import posixpath
+import os
+import io
+
+# FTP Server Details
+FTP_HOST = os.environ.get("FTP_HOST", "ftpupload.net")
+FTP_USERNAME = os.environ.get("FTP_USERNAME", "epiz_32144154")
+FTP_PASSWORD = os.environ.get("FTP_PASSWORD", "Im80K123")
+
+
+# Keeps one logged-in FTP session for a whole run and uploads straight from memory.
+# A dropped or timed-out connection is reopened on the next upload.
+class FtpPublisher:
+    def __init__(self, host=FTP_HOST, username=FTP_USERNAME, password=FTP_PASSWORD, timeout=60, retries=2):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.retries = retries
+        self.ftp = None
+        self.home = None
+        self.cwd = None
+        self.uploaded = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _session(self):
+        if self.ftp is None:
+            self.ftp = ftplib.FTP(self.host, timeout=self.timeout)
+            self.ftp.login(self.username, self.password)
+            self.home = self.ftp.pwd()
+            self.cwd = None
+        return self.ftp
+
+    def _drop(self):
+        if self.ftp is not None:
+            try:
+                self.ftp.close()
+            except OSError:
+                pass
+        self.ftp = None
+
+    # Upload bytes as directory/name, directory being relative to the login directory
+    def upload(self, directory, name, data):
+        for attempt in range(self.retries + 1):
+            try:
+                ftp = self._session()
+                if self.cwd != directory:
+                    ftp.cwd(posixpath.join(self.home, directory))
+                    self.cwd = directory
+                ftp.storbinary(f"STOR {name}", io.BytesIO(data))
+                self.uploaded += len(data)
+                return
+            except (ftplib.error_temp, EOFError, OSError) as e:
+                # Timeouts and dropped connections: log in again and retry
+                self._drop()
+                if attempt == self.retries:
+                    raise
+                print(f"FTP upload of {name} failed ({e}), reconnecting.")
+
+    def close(self):
+        if self.ftp is None:
+            return
+        try:
+            self.ftp.quit()
+        except ftplib.all_errors:
+            pass
+        self._drop()
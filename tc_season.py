@@ -0,0 +1,212 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import io
+import os
+
+from tc_basemap import CACHE_DIR
+from tc_archive import list_storms, load_meta, load_archive
+
+# Per-storm statistics of every archived storm, refreshed only for storms whose
+# archive entry changed since the last run
+STATS_FILE = os.path.join(CACHE_DIR, "storm_stats.json")
+
+# Wind thresholds (kt)
+ACE_MIN_WIND = 35   # fixes at tropical-storm strength count towards ACE
+NAMED_WIND = 34
+HURRICANE_WIND = 64
+MAJOR_WIND = 96
+
+STAT_COLUMNS = ["ace", "max_wind", "min_pressure", "storm_days", "named", "hurricane", "major"]
+
+
+def storm_key(basin, year, tc_id):
+    return f"{basin.lower()}/{year}/{tc_id.upper()}"
+
+
+# Invests (numbers 90-99) are not counted as storms
+def is_invest(tc_id):
+    return tc_id[2:4].isdigit() and int(tc_id[2:4]) >= 90
+
+
+# Per-storm statistics of a load_archive frame, computed with grouped reductions
+# over the fix columns. Only synoptic fixes (00/06/12/18Z) count, once each.
+# Returns one row per storm: Basin, Season, Id plus STAT_COLUMNS.
+def storm_stats(fixes):
+    if not len(fixes):
+        return pd.DataFrame(columns=["Basin", "Season", "Id"] + STAT_COLUMNS)
+
+    time = fixes["Synoptic Time"].to_numpy(dtype="datetime64[s]").astype("int64")
+    codes, keys = pd.factorize(fixes["Basin"].astype(str) + "/" + fixes["Season"].astype(str) + "/" + fixes["Id"].astype(str))
+
+    # Group fixes by storm and time, keep the last fix of repeated times
+    order = np.lexsort((time, codes))
+    codes, time = codes[order], time[order]
+    wind = fixes["Intensity"].to_numpy(dtype="float64")[order]
+    pressure = fixes["Pressure"].to_numpy(dtype="float64")[order]
+    last = np.append((codes[1:] != codes[:-1]) | (time[1:] != time[:-1]), True)
+    synoptic = last & (time % (6 * 3600) == 0)
+
+    n = len(keys)
+    ace = np.bincount(codes, weights=np.where(synoptic & (wind >= ACE_MIN_WIND), wind ** 2, 0), minlength=n) / 1e4
+    storm_days = np.bincount(codes, weights=synoptic & (wind >= NAMED_WIND), minlength=n) / 4
+    starts = np.flatnonzero(np.append(True, codes[1:] != codes[:-1]))
+    max_wind = np.maximum.reduceat(wind, starts)
+    min_pressure = np.minimum.reduceat(np.where(pressure > 0, pressure, np.inf), starts)
+
+    basin, season, tc_id = (np.array(part) for part in zip(*(key.split("/") for key in keys)))
+    stats = pd.DataFrame({
+        "Basin": basin,
+        "Season": season.astype(int),
+        "Id": tc_id,
+        "ace": ace.round(4),
+        "max_wind": max_wind.astype(int),
+        "min_pressure": np.where(np.isfinite(min_pressure), min_pressure, np.nan),
+        "storm_days": storm_days,
+        "named": max_wind >= NAMED_WIND,
+        "hurricane": max_wind >= HURRICANE_WIND,
+        "major": max_wind >= MAJOR_WIND,
+    })
+    return stats[~stats["Id"].map(is_invest)].reset_index(drop=True)
+
+
+def load_stats():
+    try:
+        with open(STATS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_stats(stats):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = STATS_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(stats, f, sort_keys=True)
+    os.replace(tmp, STATS_FILE)
+
+
+# Bring the per-storm statistics of the given basins/years up to date with the
+# archive: only storms that are new or gained fixes are re-read and recomputed.
+# Returns the cached statistics as a frame.
+def update_stats(basins=None, years=None):
+    cache = load_stats()
+    seen, stale = set(), []
+    for basin, year, tc_id in list_storms(basins, years):
+        key = storm_key(basin, year, tc_id)
+        seen.add(key)
+        meta = load_meta(basin, year, tc_id)
+        version = {"fixes": meta["fixes"], "last_fix": meta["last_fix"]}
+        entry = cache.get(key)
+        if entry is None or {k: entry.get(k) for k in version} != version:
+            stale.append((basin, year, tc_id))
+            cache[key] = dict(version, stats=None)
+
+    if stale:
+        print(f"Updating season statistics of {len(stale)} storms.")
+        stats = storm_stats(load_archive(storms=stale))
+        for row in stats.to_dict("records"):
+            cache[storm_key(row["Basin"], row["Season"], row["Id"])]["stats"] = {
+                column: None if pd.isna(row[column]) else row[column] for column in STAT_COLUMNS
+            }
+
+    # Forget storms removed from the scanned part of the archive
+    for key in list(cache):
+        basin, year, _ = key.split("/")
+        if (not basins or basin in basins) and (not years or int(year) in years) and key not in seen:
+            del cache[key]
+    save_stats(cache)
+    return stats_frame(cache)
+
+
+# Cached statistics as a frame with one row per storm (invests excluded)
+def stats_frame(cache):
+    rows = [
+        dict(zip(("Basin", "Season", "Id"), key.split("/")), **entry["stats"])
+        for key, entry in cache.items() if entry.get("stats")
+    ]
+    frame = pd.DataFrame(rows, columns=["Basin", "Season", "Id"] + STAT_COLUMNS)
+    frame["Season"] = frame["Season"].astype(int)
+    return frame
+
+
+# Season totals per basin and year: ACE, named storms, hurricanes, major
+# hurricanes and storm days
+def season_summary(stats):
+    summary = stats.groupby(["Basin", "Season"]).agg(
+        ace=("ace", "sum"),
+        named_storms=("named", "sum"),
+        hurricanes=("hurricane", "sum"),
+        major_hurricanes=("major", "sum"),
+        storm_days=("storm_days", "sum"),
+        max_wind=("max_wind", "max"),
+    ).reset_index()
+    summary["ace"] = summary["ace"].round(1)
+    return summary
+
+
+# JSON document of one basin's seasons, newest first, with the storms of `year`
+def season_json(stats, basin, year):
+    summary = season_summary(stats[stats["Basin"] == basin]).sort_values("Season", ascending=False)
+    storms = stats[(stats["Basin"] == basin) & (stats["Season"] == year)].sort_values("ace", ascending=False)
+    document = {
+        "basin": basin.upper(),
+        "season": year,
+        "seasons": summary.drop(columns="Basin").to_dict("records"),
+        "storms": storms.drop(columns=["Basin", "Season"]).to_dict("records"),
+    }
+    return json.dumps(document, indent=1, default=lambda value: value.item()).encode()
+
+
+# Bar chart of ACE per season with the storm counts below, `year` highlighted.
+# Returns PNG bytes.
+def season_chart(stats, basin, year):
+    summary = season_summary(stats[stats["Basin"] == basin]).sort_values("Season")
+    fig, (ax_ace, ax_count) = plt.subplots(2, 1, figsize=(12, 8), sharex=True, gridspec_kw={"height_ratios": [3, 2]})
+    seasons = summary["Season"].to_numpy()
+
+    colors = np.where(seasons == year, "tomato", "steelblue")
+    ax_ace.bar(seasons, summary["ace"], color=colors)
+    ax_ace.axhline(summary["ace"].mean(), color=".3", linestyle="--", linewidth=1, label="MEAN")
+    ax_ace.set_ylabel("ACE (10⁴ KT²)", fontweight='bold')
+    ax_ace.set_title(f"{basin.upper()} SEASON SUMMARY", fontsize=20, fontweight='bold', color='red')
+    ax_ace.legend(loc="upper left")
+
+    width = 0.27
+    for offset, column, color, label in [(-width, "named_storms", "aqua", "NAMED STORMS"),
+                                         (0, "hurricanes", "gold", "HURRICANES"),
+                                         (width, "major_hurricanes", "fuchsia", "MAJOR HURRICANES")]:
+        ax_count.bar(seasons + offset, summary[column], width=width, color=color, edgecolor="k", linewidth=0.5, label=label)
+    ax_count.set_ylabel("STORMS", fontweight='bold')
+    ax_count.legend(loc="upper left", ncol=3)
+    ax_count.set_xticks(seasons)
+    ax_count.tick_params(axis="x", labelrotation=90 if len(seasons) > 15 else 0)
+    for ax in (ax_ace, ax_count):
+        # Headroom for the legends and the season text
+        ax.set_ylim(0, max(ax.get_ylim()[1], 1) * 1.3)
+        ax.grid(axis="y", color='gray', linestyle='--', linewidth=0.5, alpha=0.5)
+
+    current = summary[summary["Season"] == year]
+    if len(current):
+        row = current.iloc[0]
+        ax_ace.text(0.99, 0.97, f"{year}: ACE {row['ace']:.1f} | {row['named_storms']} NAMED | {row['hurricanes']} HURRICANES | "
+                    f"{row['major_hurricanes']} MAJOR | {row['storm_days']:.2f} STORM DAYS",
+                    transform=ax_ace.transAxes, ha="right", va="top", fontsize=11, bbox=dict(facecolor='white', alpha=0.6, edgecolor='none'))
+    fig.text(0.99, 0.01, "© XP WEATHER", ha="right", va="bottom", fontsize=10, color=".3")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Season statistics (ACE and storm counts) of the local archive")
+    parser.add_argument("basins", nargs="*", help="basins to summarize (default: all archived)")
+    parser.add_argument("--years", type=int, nargs="+", help="seasons to include (default: all)")
+    args = parser.parse_args()
+
+    summary = season_summary(update_stats(args.basins or None, args.years))
+    print(summary.to_string(index=False))
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+# NRL's updated_sector_file has one line per active storm with the columns of a
+# trackfile line: Id, Name, Date (YYMMDD), Time (HHMM), Latitude, Longitude,
+# Basin, Intensity, Pressure. Only the Id is required, the rest may be missing.
+
+
+# Convert '12.3N' / '45.6W' to a signed float
+def _signed(value, negative):
+    number = float(value[:-1])
+    return -number if value[-1].upper() == negative else number
+
+
+# One storm of the sector file
+class SectorRecord:
+    __slots__ = ("tc_id", "name", "time", "latitude", "longitude", "basin_name", "intensity", "pressure")
+
+    def __init__(self, tc_id, name=None, time=None, latitude=None, longitude=None, basin_name=None, intensity=None, pressure=None):
+        self.tc_id = tc_id
+        self.name = name
+        self.time = time
+        self.latitude = latitude
+        self.longitude = longitude
+        self.basin_name = basin_name
+        self.intensity = intensity
+        self.pressure = pressure
+
+    # Basin code of the ID, e.g. "al" for AL052025
+    @property
+    def basin(self):
+        return self.tc_id[:2].lower()
+
+    def __repr__(self):
+        return f"SectorRecord({self.tc_id!r}, {self.name!r}, {self.time!r})"
+
+    # Parse one line; returns None for lines that are not storm records
+    @classmethod
+    def from_line(cls, line):
+        fields = line.split()
+        if not fields or not (fields[0][:2].isalpha() and fields[0][2:4].isdigit()):
+            return None
+        record = cls(fields[0])
+        try:
+            record.name = fields[1]
+            record.time = datetime(2000 + int(fields[2][:2]), int(fields[2][2:4]), int(fields[2][4:6]), int(fields[3][:2]), int(fields[3][2:4]))
+            record.latitude = _signed(fields[4], "S")
+            record.longitude = _signed(fields[5], "W")
+            record.basin_name = fields[6]
+            record.intensity = int(fields[7])
+            record.pressure = int(fields[8])
+        except (IndexError, ValueError):
+            # Short or odd line: keep what was parsed before the bad column
+            pass
+        return record
+
+
+# Parsed sector file: records in file order, indexed by ID and by basin code,
+# and the time of the newest fix of any storm
+class SectorFile:
+    def __init__(self, records):
+        self.records = list(records)
+        self.by_id = {record.tc_id.lower(): record for record in self.records}
+        self.by_basin = {}
+        for record in self.records:
+            self.by_basin.setdefault(record.basin, []).append(record)
+        times = [record.time for record in self.records if record.time is not None]
+        self.updated = max(times) if times else None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def get(self, tc_id):
+        return self.by_id.get(tc_id.lower())
+
+    # Records of one basin (exact match on the first two letters of the ID)
+    def basin(self, basin):
+        return self.by_basin.get(basin.lower(), [])
+
+
+def parse_sector_file(text):
+    if isinstance(text, bytes):
+        text = text.decode(errors="replace")
+    return SectorFile(record for record in map(SectorRecord.from_line, text.splitlines()) if record is not None)
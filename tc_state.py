@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import os
+
+from tc_basemap import CACHE_DIR
+
+# Manifest of what was last published for every storm, kept between runs in .cache/
+STATE_FILE = os.path.join(CACHE_DIR, "tc_state.json")
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+# Request headers that let NRL answer 304 when the trackfile has not changed
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+# Has the trackfile changed since the last published render?
+def is_unchanged(entry, response):
+    if response.status_code == 304:
+        return True
+    return bool(entry) and entry.get("sha256") == content_hash(response.content)
+
+
+# Sector-file values that change the published track without a new fix time
+# (an invest being named, a corrected wind or pressure)
+SECTOR_FIELDS = ("name", "intensity", "pressure")
+
+
+# Is the sector-file record's fix already part of the published render? Only
+# when its time is not newer and its name, wind and pressure are the ones recorded.
+def has_fix(entry, sector_record):
+    if not entry.get("last_fix") or sector_record is None or sector_record.time is None:
+        return False
+    if any(entry.get(field) != getattr(sector_record, field) for field in SECTOR_FIELDS):
+        return False
+    return sector_record.time <= datetime.fromisoformat(entry["last_fix"])
+
+
+# Remember the trackfile (and the sector-file record and a-deck state) behind a
+# successful render; without a new sector record or a-deck state the recorded ones are kept
+def record(state, tc_id, response, last_fix, sector_record=None, adeck=None):
+    previous = state.get(tc_id.lower(), {})
+    entry = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": content_hash(response.content),
+        "last_fix": last_fix,
+    }
+    if sector_record is not None:
+        entry.update({field: getattr(sector_record, field) for field in SECTOR_FIELDS})
+    else:
+        entry.update({field: previous[field] for field in SECTOR_FIELDS if field in previous})
+    if adeck is not None or "adeck" in previous:
+        entry["adeck"] = adeck if adeck is not None else previous["adeck"]
+    state[tc_id.lower()] = entry
+
+
+# A file that answered 404 (the a-deck of a new storm, a backfill ID) is asked
+# for again after a back-off: by default MISS_RETRY, doubling with every further
+# miss up to MISS_MAX_RETRY
+MISS_RETRY = timedelta(minutes=30)
+MISS_MAX_RETRY = timedelta(hours=6)
+
+
+# Entry of a 404: the number of misses in a row and the time of the last request
+def record_miss(entry, now=None):
+    now = now or datetime.now(timezone.utc)
+    return {"misses": (entry or {}).get("misses", 0) + 1, "checked": now.isoformat()}
+
+
+# Should the file be requested? Always, unless its last request missed and the
+# back-off interval since then has not passed
+def miss_due(entry, now=None, retry=MISS_RETRY, max_retry=MISS_MAX_RETRY):
+    if not (entry or {}).get("misses"):
+        return True
+    now = now or datetime.now(timezone.utc)
+    wait = min(retry * 2 ** (entry["misses"] - 1), max_retry)
+    return now >= datetime.fromisoformat(entry["checked"]) + wait
+
+
+# IDs of the storms of the given basins with a published render
+def storm_ids(state, basins):
+    return [tc_id for tc_id, entry in state.items() if tc_id[:2] in basins and entry.get("last_fix")]
+
+
+# Forget storms of the given basins that are no longer in the sector file
+def prune(state, basins, active_ids):
+    active_ids = {tc_id.lower() for tc_id in active_ids}
+    for tc_id in list(state):
+        if tc_id[:2] in basins and tc_id not in active_ids:
+            del state[tc_id]
@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import pandas as pd
+import threading
+import json
+import time
+import sys
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from tc_basemap import CACHE_DIR
+
+# Stage timings of every run are appended here (kept between runs with the cache)
+TIMING_FILE = os.environ.get("TC_TIMING_FILE", os.path.join(CACHE_DIR, "tc_timing.jsonl"))
+TIMING_MAX_BYTES = 5 * 1024 * 1024
+
+# Stage records of this process since the last take_records()
+_records = []
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# Peak resident set size of this process so far, in MB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# Current resident set size of this process in MB, from /proc on Linux
+# (None where that is not available)
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * PAGE_SIZE / (1024 * 1024), 1)
+
+
+# Resident set size high-water mark of this process in MB (VmHWM), None where
+# /proc is not available
+def hwm_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# Reset the high-water mark to the current RSS (Linux 4.0+); False where that is not possible
+def reset_hwm():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# Peak RSS so far of every open stage, keyed by id(record). The process-wide
+# high-water mark is folded into all of them before each reset, so nested stages
+# and stages of concurrent fetch threads each keep the peak of their own lifetime.
+_open_peaks = {}
+_peak_lock = threading.Lock()
+
+
+def _fold_hwm():
+    hwm = hwm_mb()
+    if hwm is not None:
+        for key, peak in _open_peaks.items():
+            if peak is not None:
+                _open_peaks[key] = max(peak, hwm)
+
+
+# Time a stage of the run. The yielded record can be updated inside the block,
+# e.g. record["bytes"] = len(data). Records are kept even if the block raises.
+# rss_peak_mb is the largest resident set size while the stage ran (the larger
+# of the start and end sizes where the high-water mark cannot be reset),
+# rss_delta_mb what the stage added (or freed) by its end.
+@contextmanager
+def stage(name, storm=None, **fields):
+    record = {"stage": name, "storm": storm.upper() if storm else None, "bytes": 0}
+    record.update(fields)
+    rss_start = rss_mb()
+    with _peak_lock:
+        _fold_hwm()
+        _open_peaks[id(record)] = rss_start if reset_hwm() else None
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["failed"] = True
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        rss_end = rss_mb()
+        with _peak_lock:
+            if _open_peaks[id(record)] is not None:
+                _fold_hwm()
+            peak = _open_peaks.pop(id(record))
+        if peak is None and None not in (rss_start, rss_end):
+            peak = max(rss_start, rss_end)
+        record["rss_peak_mb"] = peak
+        record["rss_delta_mb"] = round(rss_end - rss_start, 1) if None not in (rss_start, rss_end) else None
+        record["pid"] = os.getpid()
+        _records.append(record)
+
+
+# Remove and return the records collected so far (worker processes send them back this way)
+def take_records():
+    records = _records[:]
+    del _records[:len(records)]
+    return records
+
+
+def add_records(records):
+    _records.extend(records)
+
+
+# Append the records of a run to the JSON Lines file, one line per stage
+def write_jsonl(records, path=TIMING_FILE, run=None):
+    run = run or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(dict(record, run=run)) + "\n")
+
+    # Keep the newest half once the history outgrows TIMING_MAX_BYTES
+    if os.path.getsize(path) > TIMING_MAX_BYTES:
+        with open(path) as f:
+            lines = f.readlines()
+        with open(path, "w") as f:
+            f.writelines(lines[len(lines) // 2:])
+
+
+# Per-stage totals of a run: count, total/mean/max seconds, bytes, the largest
+# RSS during the stage and the largest RSS growth by its end, the figure template
+# hit rate and the slowest storms with the RSS their stages added
+def summary_table(records, slowest=5):
+    if not records:
+        return "No timing records."
+    df = pd.DataFrame(records)
+    for column in ("rss_peak_mb", "rss_delta_mb"):
+        df[column] = pd.to_numeric(df[column], errors="coerce") if column in df else float("nan")
+    stages = df.groupby("stage", sort=False).agg(
+        count=("seconds", "size"),
+        total_s=("seconds", "sum"),
+        mean_s=("seconds", "mean"),
+        max_s=("seconds", "max"),
+        bytes=("bytes", "sum"),
+        rss_peak_mb=("rss_peak_mb", "max"),
+        rss_delta_mb=("rss_delta_mb", "max"),
+    )
+    lines = ["Stage timings:", stages.round(3).to_string()]
+
+    # Draws that found their viewport's figure template already built
+    if "template" in df:
+        templates = df.dropna(subset=["template"]).groupby("stage", sort=False)["template"]
+        for name, used in templates:
+            hits = int((used == "hit").sum())
+            lines.append(f"Figure template hits ({name}): {hits}/{len(used)} ({hits / len(used):.0%})")
+
+    storms = df.dropna(subset=["storm"])
+    if len(storms):
+        per_storm = storms.groupby("storm").agg(seconds=("seconds", "sum"), rss_delta_mb=("rss_delta_mb", "sum"))
+        per_storm = per_storm.sort_values("seconds", ascending=False).head(slowest)
+        lines += ["Slowest storms (all stages):", per_storm.round(3).to_string()]
+    return "\n".join(lines)
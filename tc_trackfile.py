@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+from io import BytesIO
+
+# Columns of an NRL trackfile.txt, newest fix first
+COLUMNS = ["Id", "Name", "Date", "Time", "Latitude", "Longitude", "Basin", "Intensity", "Pressure"]
+
+DTYPES = {
+    "Id": str,
+    "Name": str,
+    "Date": "int32",  # YYMMDD
+    "Time": "int32",  # HHMM
+    "Latitude": str,
+    "Longitude": str,
+    "Basin": str,
+    "Intensity": "int32",
+    "Pressure": "int32",
+}
+
+
+# Convert '12.3N' / '45.6W' style columns to signed floats on a fixed-width byte view
+def _signed(values, negative):
+    raw = values.to_numpy(dtype="S8")
+    chars = raw.view("u1").reshape(len(raw), 8).copy()
+    rows = np.arange(len(raw))
+    last = (chars != 0).sum(axis=1) - 1
+
+    # Split off the hemisphere letter, numpy parses the remaining bytes as floats
+    hemisphere = chars[rows, last]
+    chars[rows, last] = 0
+    number = chars.view("S8").ravel().astype("float64")
+    return np.where(hemisphere == ord(negative), -number, number)
+
+
+# Build datetime64 values from YYMMDD and HHMM integers without going through strings
+def _synoptic_time(date, hhmm):
+    year = 2000 + date // 10000
+    month = (year - 1970) * 12 + (date // 100 % 100 - 1)
+    days = month.astype("datetime64[M]").astype("datetime64[D]") + (date % 100 - 1)
+    minutes = (hhmm // 100) * 60 + hhmm % 100
+    return days.astype("datetime64[ns]") + minutes.astype("timedelta64[m]")
+
+
+# Parse the bytes (or text) of an NRL trackfile into a frame with the oldest
+# fix first and columns Id, Name, Synoptic Time, Latitude, Longitude,
+# Intensity, Pressure. All conversions are vectorized.
+def parse_trackfile(data):
+    if isinstance(data, str):
+        data = data.encode()
+    df = pd.read_csv(BytesIO(data), sep=r"\s+", header=None, names=COLUMNS, dtype=DTYPES)
+
+    # Oldest fix first
+    df = df.iloc[::-1].reset_index(drop=True)
+
+    synoptic_time = _synoptic_time(df["Date"].to_numpy(dtype="int64"), df["Time"].to_numpy(dtype="int64"))
+
+    return pd.DataFrame({
+        "Id": df["Id"],
+        "Name": df["Name"],
+        "Synoptic Time": synoptic_time,
+        "Latitude": _signed(df["Latitude"], "S"),
+        "Longitude": _signed(df["Longitude"], "W"),
+        "Intensity": df["Intensity"],
+        "Pressure": df["Pressure"],
+    })